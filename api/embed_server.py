@@ -1,33 +1,173 @@
 """Embedding server using sentence-transformers BGE-M3."""
 
+import asyncio
+import hashlib
+import multiprocessing
 import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
-# Global model reference (loaded lazily)
+# Global model reference (loaded lazily, guarded so only one thread loads it)
 model = None
+model_lock = threading.Lock()
+# torch thread counts are set once per process: set_num_interop_threads
+# raises if called again, which would break every retry after a failed load
+torch_threads_set = False
+
+# Model and inference backend. EMBED_BACKEND=onnx runs through onnxruntime
+# (needs `sentence-transformers[onnx]`); EMBED_ONNX_FILE picks a specific
+# exported file such as the int8 quantized one (see README).
+MODEL_NAME = os.environ.get("EMBED_MODEL", "BAAI/bge-m3")
+EMBED_BACKEND = os.environ.get("EMBED_BACKEND", "torch")
+EMBED_ONNX_FILE = os.environ.get("EMBED_ONNX_FILE")
+
+# Intra-op threads for CPU inference (default: all cores but one)
+TORCH_NUM_THREADS = int(
+    os.environ.get("TORCH_NUM_THREADS", max(1, (os.cpu_count() or 1) - 1))
+)
+
+# LRU cache of recent embeddings keyed by SHA-256 of the input text.
+# Kept inline (not shared with src/) since this server is deployed standalone.
+EMBED_CACHE_SIZE = int(os.environ.get("EMBED_CACHE_SIZE", "10000"))
+embed_cache: OrderedDict = OrderedDict()
+
+# Micro-batching: texts arriving within the window are encoded in one call
+EMBED_BATCH_WINDOW = float(os.environ.get("EMBED_BATCH_WINDOW_MS", "10")) / 1000
+EMBED_MAX_BATCH = int(os.environ.get("EMBED_MAX_BATCH", "32"))
+embed_queue: asyncio.Queue | None = None
+
+# Optional background re-ingestion of a vault (local use from the repo root,
+# see `make embed-server`). Disabled unless INGEST_VAULT_PATH is set.
+INGEST_VAULT_PATH = os.environ.get("INGEST_VAULT_PATH")
+INGEST_DB_PATH = os.environ.get("INGEST_DB_PATH", "second_brain.duckdb")
+INGEST_MODEL = os.environ.get("INGEST_MODEL")
+ingest_pool: ProcessPoolExecutor | None = None
+ingest_job: asyncio.Future | None = None
+
+# Ingester kept alive inside the ingestion worker process between runs
+worker_ingester = None
 
 
 def get_model():
-    """Load model on first use (lazy loading)."""
-    global model
-    if model is None:
-        print("Loading BGE-M3 model...")
-        from sentence_transformers import SentenceTransformer
-        model = SentenceTransformer("BAAI/bge-m3")
-        print("Model loaded!")
+    """Load model on first use (lazy loading, heavy imports deferred too)."""
+    global model, torch_threads_set
+    if model is not None:
+        return model
+    with model_lock:
+        if model is None:
+            print(f"Loading {MODEL_NAME} model (backend: {EMBED_BACKEND})...")
+            import torch
+            from sentence_transformers import SentenceTransformer
+            # Set before the first forward pass; interop threads can't change later
+            if not torch_threads_set:
+                torch_threads_set = True
+                torch.set_num_threads(TORCH_NUM_THREADS)
+                torch.set_num_interop_threads(2)
+                print(f"Torch threads: {torch.get_num_threads()}")
+            model_kwargs = {"file_name": EMBED_ONNX_FILE} if EMBED_ONNX_FILE else None
+            model = SentenceTransformer(
+                MODEL_NAME, backend=EMBED_BACKEND, model_kwargs=model_kwargs
+            )
+            print("Model loaded!")
     return model
 
 
+def encode_cached(texts: list[str]) -> list:
+    """
+    Encode texts, serving repeated inputs from the LRU cache.
+
+    Misses are encoded together in a single model call. Only called from the
+    batch worker thread, so the cache needs no locking.
+    """
+    keys = [hashlib.sha256(text.encode("utf-8")).digest() for text in texts]
+    cached = {key: embed_cache[key] for key in keys if key in embed_cache}
+    for key in cached:
+        embed_cache.move_to_end(key)
+
+    # Deduplicated misses (the same text may be queued more than once)
+    missing = {key: text for key, text in zip(keys, texts) if key not in cached}
+    if missing:
+        encoded = get_model().encode(
+            list(missing.values()), batch_size=EMBED_MAX_BATCH
+        )
+        for key, emb in zip(missing, encoded):
+            cached[key] = emb
+            embed_cache[key] = emb
+        while len(embed_cache) > EMBED_CACHE_SIZE:
+            embed_cache.popitem(last=False)
+
+    return [cached[key] for key in keys]
+
+
+async def batch_worker(queue: asyncio.Queue):
+    """Collect queued (text, future) pairs and encode them in batches."""
+    loop = asyncio.get_running_loop()
+    while True:
+        items = [await queue.get()]
+        deadline = loop.time() + EMBED_BATCH_WINDOW
+        while len(items) < EMBED_MAX_BATCH:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                items.append(await asyncio.wait_for(queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        # Encode off the event loop so other requests keep being accepted
+        try:
+            embeddings = await asyncio.to_thread(
+                encode_cached, [text for text, _ in items]
+            )
+        except Exception as e:
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+            continue
+
+        for (_, future), embedding in zip(items, embeddings):
+            if not future.done():
+                future.set_result(embedding)
+
+
+def run_ingestion(vault_path: str, db_path: str, model_name: str | None):
+    """
+    Re-ingest the vault. Runs in the ingestion worker process.
+
+    The ingester (and its loaded embedding model) is reused across runs;
+    only the database connection is closed afterwards so readers can open it.
+    """
+    global worker_ingester
+    from src.database.ingestion import SecondBrainIngester
+    if worker_ingester is None:
+        worker_ingester = SecondBrainIngester(db_path, model_name=model_name)
+    try:
+        worker_ingester.ingest_vault(vault_path)
+    finally:
+        worker_ingester.close()
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup: just log, don't load model yet
+    global embed_queue
+    # Startup: start the batch worker, don't load model yet
     print("Server starting...")
+    if int(os.environ.get("WEB_CONCURRENCY", "1")) > 1:
+        print("Warning: run with a single uvicorn worker; every worker loads "
+              "its own copy of the model and they compete for the same CPU/GPU")
+    embed_queue = asyncio.Queue()
+    worker = asyncio.create_task(batch_worker(embed_queue))
     yield
     # Shutdown
     print("Server shutting down...")
+    worker.cancel()
+    if ingest_pool is not None:
+        ingest_pool.shutdown(wait=False, cancel_futures=True)
 
 
 app = FastAPI(title="BGE-M3 Embedding Server", lifespan=lifespan)
@@ -59,13 +199,38 @@ class EmbedResponse(BaseModel):
     embedding: list[float]
 
 
+async def queue_embedding(text: str):
+    """Hand text to the batch worker and wait for its embedding."""
+    future = asyncio.get_running_loop().create_future()
+    await embed_queue.put((text, future))
+    return await future  # Model loads on first miss
+
+
 @app.post("/embed", response_model=EmbedResponse)
 async def embed(request: EmbedRequest):
     """Generate embedding for input text."""
     try:
-        m = get_model()  # Loads on first request
-        embedding = m.encode(request.text).tolist()
-        return EmbedResponse(embedding=embedding)
+        embedding = await queue_embedding(request.text)
+        return EmbedResponse(embedding=embedding.tolist())
+    except Exception as e:
+        print(f"Embedding error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/embed_bin", response_class=Response)
+async def embed_bin(request: EmbedRequest):
+    """
+    Generate embedding as raw little-endian float32 bytes.
+
+    Skips building a list of Python floats, response validation and JSON
+    float formatting. Decode with `np.frombuffer(resp.content, dtype="<f4")`.
+    """
+    try:
+        embedding = await queue_embedding(request.text)
+        return Response(
+            content=embedding.astype("<f4").tobytes(),
+            media_type="application/octet-stream",
+        )
     except Exception as e:
         print(f"Embedding error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -74,7 +239,55 @@ async def embed(request: EmbedRequest):
 @app.get("/health")
 async def health():
     """Health check endpoint - returns OK immediately (model loads lazily)."""
-    return {"status": "ok", "model": "BAAI/bge-m3", "loaded": model is not None}
+    return {
+        "status": "ok",
+        "model": MODEL_NAME,
+        "backend": EMBED_BACKEND,
+        "loaded": model is not None,
+        "cache_size": len(embed_cache),
+    }
+
+
+@app.post("/warmup")
+async def warmup():
+    """Load the model now (off the event loop) instead of on the first /embed."""
+    await asyncio.to_thread(get_model)
+    return {"status": "ok", "model": MODEL_NAME, "loaded": True}
+
+
+@app.post("/ingest", status_code=202)
+async def ingest():
+    """Start re-ingesting the configured vault in a separate process."""
+    global ingest_pool, ingest_job
+    if not INGEST_VAULT_PATH:
+        raise HTTPException(status_code=404, detail="Ingestion disabled (set INGEST_VAULT_PATH)")
+    if not os.path.isdir(INGEST_VAULT_PATH):
+        raise HTTPException(status_code=500, detail=f"Vault path does not exist: {INGEST_VAULT_PATH}")
+    if ingest_job is not None and not ingest_job.done():
+        raise HTTPException(status_code=409, detail="Ingestion already running")
+
+    # One worker process: parsing and encoding never block /embed. Spawned,
+    # not forked: forking this multi-threaded server can deadlock the child
+    if ingest_pool is None:
+        ingest_pool = ProcessPoolExecutor(
+            max_workers=1, mp_context=multiprocessing.get_context("spawn")
+        )
+    ingest_job = asyncio.get_running_loop().run_in_executor(
+        ingest_pool, run_ingestion, INGEST_VAULT_PATH, INGEST_DB_PATH, INGEST_MODEL
+    )
+    return {"status": "started", "vault": INGEST_VAULT_PATH, "db": INGEST_DB_PATH}
+
+
+@app.get("/ingest")
+async def ingest_status():
+    """Report the state of the last ingestion run."""
+    if ingest_job is None:
+        return {"status": "idle"}
+    if not ingest_job.done():
+        return {"status": "running"}
+    if ingest_job.exception() is not None:
+        return {"status": "failed", "error": str(ingest_job.exception())}
+    return {"status": "done"}
 
 
 @app.get("/")
@@ -83,5 +296,5 @@ async def root():
     return {
         "service": "BGE-M3 Embedding Server",
         "model_loaded": model is not None,
-        "endpoints": ["/embed", "/health"],
+        "endpoints": ["/embed", "/embed_bin", "/health", "/warmup", "/ingest"],
     }
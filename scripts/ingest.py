@@ -53,7 +53,7 @@ Default: {DEFAULT_MODEL}
         "--batch-size",
         type=int,
         default=100,
-        help="Notes to process per batch (default: 100)"
+        help="Notes buffered per database insert (default: 100)"
     )
     parser.add_argument(
         "--embedding-batch-size",
@@ -61,6 +61,39 @@ Default: {DEFAULT_MODEL}
         default=64,
         help="Texts per embedding batch (default: 64, use 128+ for GPU)"
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Parallel processes for parsing notes (default: CPU count, 1 disables)"
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=None,
+        help="DuckDB worker threads (default: one per CPU core)"
+    )
+    parser.add_argument(
+        "--memory-limit",
+        default=None,
+        help="DuckDB memory limit, e.g. 8GB (default: 80%% of RAM)"
+    )
+    parser.add_argument(
+        "--backend",
+        choices=["torch", "onnx"],
+        default="torch",
+        help="Embedding backend; 'onnx' needs sentence-transformers[onnx] (default: torch)"
+    )
+    parser.add_argument(
+        "--onnx-file",
+        help="ONNX file within the model, e.g. onnx/model_qint8_avx2.onnx (with --backend onnx)"
+    )
+    parser.add_argument(
+        "--torch-threads",
+        type=int,
+        default=None,
+        help="PyTorch CPU threads for embedding (default: one per physical core)"
+    )
 
     args = parser.parse_args()
 
@@ -82,12 +115,21 @@ Default: {DEFAULT_MODEL}
     print(f"Model: {args.model}")
     print()
 
-    ingester = SecondBrainIngester(db_path, model_name=args.model)
+    ingester = SecondBrainIngester(
+        db_path,
+        model_name=args.model,
+        threads=args.threads,
+        memory_limit=args.memory_limit,
+        backend=args.backend,
+        onnx_file=args.onnx_file,
+        torch_threads=args.torch_threads
+    )
     try:
         ingester.ingest_vault(
             str(vault_path),
             batch_size=args.batch_size,
-            embedding_batch_size=args.embedding_batch_size
+            embedding_batch_size=args.embedding_batch_size,
+            workers=args.workers
         )
     finally:
         ingester.close()
@@ -4,12 +4,14 @@ Query Second Brain knowledge base.
 
 Usage:
     python scripts/query.py semantic "search query" [--limit N]
+    python scripts/query.py semantic - < queries.txt   (one query per line)
     python scripts/query.py backlinks "note-slug"
     python scripts/query.py connections "note-slug" [--hops N]
     python scripts/query.py hidden "query" --seed "note-slug"
     python scripts/query.py shared-tags "note-slug" [--min-shared N]
     python scripts/query.py graph-boosted "query" --seed "note-slug" [--boost N]
     python scripts/query.py sql "SELECT * FROM notes LIMIT 5"
+    python scripts/query.py serve < commands.txt   (one command per line)
 
 Examples:
     python scripts/query.py semantic "semantic layer data modeling" --limit 10
@@ -20,51 +22,220 @@ Examples:
     python scripts/query.py graph-boosted "data modeling" --seed "data-contracts" --boost 1.3
 """
 import argparse
+import shlex
 import sys
 from pathlib import Path
-from typing import Optional, List
+from typing import Callable, Optional, List, Tuple
 
 # Add src to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 import duckdb
-from sentence_transformers import SentenceTransformer
+import numpy as np
+from tabulate import tabulate
+
+from src.embeddings.cache import EmbeddingCache, DiskEmbeddingCache, SimilarityCache
+
+# Nearest chunks fetched per requested result before grouping by note. Only
+# untagged semantic search takes them with an `ORDER BY array_cosine_distance(...)
+# LIMIT k` over the bare embeddings table, the shape VSS answers from the HNSW
+# index. Hidden connections (seed and links filtered out first) and graph-boosted
+# search (top-K plus the linked notes' chunks) are full top-N scans. When
+# grouping leaves fewer than the requested notes, K grows by CANDIDATES_GROWTH
+# and the query reruns, up to a full scan.
+CANDIDATES_PER_RESULT = 10
+CANDIDATES_GROWTH = 4
 
 
 class SecondBrainQuery:
     """Query interface for Second Brain knowledge base."""
 
-    def __init__(self, db_path: str = 'second_brain.duckdb'):
-        """Initialize with database connection."""
+    def __init__(
+        self,
+        db_path: str = 'second_brain.duckdb',
+        backend: str = 'torch',
+        onnx_file: Optional[str] = None,
+        torch_threads: Optional[int] = None,
+        threads: Optional[int] = None,
+        memory_limit: Optional[str] = None
+    ):
+        """
+        Initialize with database connection.
+
+        Args:
+            db_path: Path to DuckDB database
+            backend: sentence-transformers backend for query encoding
+                ('torch', or 'onnx' for onnxruntime on CPU)
+            onnx_file: ONNX file inside the model repo, e.g. a quantized
+                'onnx/model_qint8_avx2.onnx' (backend 'onnx' only)
+            torch_threads: PyTorch CPU threads for query encoding (default: torch's)
+            threads: DuckDB worker threads (default: DuckDB's, one per core)
+            memory_limit: DuckDB memory limit, e.g. '2GB' (default: DuckDB's, 80% of RAM)
+        """
         self.db_path = db_path
+        self.backend = backend
+        self.onnx_file = onnx_file
+        self.torch_threads = torch_threads
         self.conn = duckdb.connect(db_path, read_only=True)
+        if threads:
+            self.conn.execute(f"SET threads = {int(threads)}")
+        if memory_limit:
+            self.conn.execute("SET memory_limit = ?", [memory_limit])
+        # Long scans would otherwise draw a progress bar into the CLI output
+        self.conn.execute("SET enable_progress_bar = false")
         self.conn.execute("LOAD vss;")
         self._embedder = None
+        self._query_cache = EmbeddingCache(maxsize=1024)
+        self._result_cache = SimilarityCache()
+        self._neighbor_cache: dict[str, List[str]] = {}
+        self._matrix: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None
+        self._num_embeddings: Optional[int] = None
 
         # Read model config from database metadata
         try:
-            result = self.conn.execute(
-                "SELECT value FROM metadata WHERE key = 'model_name'"
-            ).fetchone()
-            self.model_name = result[0] if result else 'all-MiniLM-L6-v2'
-
-            result = self.conn.execute(
-                "SELECT value FROM metadata WHERE key = 'embedding_dim'"
-            ).fetchone()
-            self.embedding_dim = int(result[0]) if result else 384
+            metadata = dict(self.conn.execute(
+                "SELECT key, value FROM metadata WHERE key IN ('model_name', 'embedding_dim')"
+            ).fetchall())
+            self.model_name = metadata.get('model_name', 'all-MiniLM-L6-v2')
+            self.embedding_dim = int(metadata.get('embedding_dim', 384))
         except Exception:
             # Fallback for old databases without metadata table
             self.model_name = 'all-MiniLM-L6-v2'
             self.embedding_dim = 384
 
+        # Databases ingested before chunks.content_snippet existed truncate
+        # the content at query time instead; re-ingest to store the snippet
+        has_snippet = self.conn.execute("""
+            SELECT count(*) FROM duckdb_columns()
+            WHERE table_name = 'chunks' AND column_name = 'content_snippet'
+        """).fetchone()[0]
+        self._snippet_sql = "c.content_snippet" if has_snippet else (
+            "CASE WHEN length(c.content) > 300 "
+            "THEN left(c.content, 300) || '...' ELSE c.content END"
+        )
+
+        # Query embeddings persisted next to the database across invocations.
+        # Non-torch backends get their own keys: quantized ONNX vectors differ
+        # slightly from the PyTorch ones.
+        cache_model = self.model_name
+        if backend != 'torch':
+            cache_model = f"{self.model_name}:{backend}:{onnx_file or ''}"
+        self._disk_query_cache = DiskEmbeddingCache(
+            str(Path(db_path).with_suffix('.query_cache.duckdb')),
+            cache_model
+        )
+
     @property
     def embedder(self):
         """Lazy load embedding model."""
         if self._embedder is None:
+            # Imported here so graph-only commands never pay for torch
+            from sentence_transformers import SentenceTransformer
+
+            if self.torch_threads:
+                import torch
+                torch.set_num_threads(self.torch_threads)
+
             print(f"Loading embedding model: {self.model_name}...", file=sys.stderr)
-            self._embedder = SentenceTransformer(self.model_name)
+            model_kwargs = {"file_name": self.onnx_file} if self.onnx_file else None
+            self._embedder = SentenceTransformer(
+                self.model_name, backend=self.backend, model_kwargs=model_kwargs
+            )
         return self._embedder
 
+    def _encode_query(self, query: str) -> np.ndarray:
+        """Encode a single search query (see _encode_queries)."""
+        return self._encode_queries([query])[0]
+
+    def _encode_queries(self, queries: List[str]) -> np.ndarray:
+        """
+        Encode search queries, reusing the embeddings of repeated queries.
+
+        Looks in the in-process cache, then the on-disk cache, and only
+        loads the model on a miss in both. All misses go to a single
+        `encode` call so tokenization and forward passes are batched.
+        """
+        embeddings: List[Optional[np.ndarray]] = []
+        missing: List[str] = []
+        for query in queries:
+            embedding = self._query_cache.get(query)
+            if embedding is None:
+                embedding = self._disk_query_cache.get(query)
+                if embedding is None:
+                    missing.append(query)
+                else:
+                    self._query_cache.put(query, embedding)
+            embeddings.append(embedding)
+
+        if missing:
+            unique = list(dict.fromkeys(missing))
+            encoded = self.embedder.encode(
+                unique, batch_size=64, convert_to_numpy=True, show_progress_bar=False
+            )
+            encoded_by_query = dict(zip(unique, encoded))
+            for query, embedding in encoded_by_query.items():
+                self._disk_query_cache.put(query, embedding)
+                self._query_cache.put(query, embedding)
+            embeddings = [
+                e if e is not None else encoded_by_query[q]
+                for q, e in zip(queries, embeddings)
+            ]
+
+        return np.stack(embeddings).astype(np.float32, copy=False)
+
+    def _direct_neighbors(self, slug: str) -> List[str]:
+        """
+        Slugs linked to or from a note, cached for the session.
+
+        Exploring one seed note usually means several hidden/graph-boosted
+        queries in a row; the link scan runs once per seed instead of per query.
+        """
+        neighbors = self._neighbor_cache.get(slug)
+        if neighbors is None:
+            rows = self.conn.execute("""
+                SELECT target_slug as slug FROM links WHERE source_slug = $1
+                UNION
+                SELECT source_slug as slug FROM links WHERE target_slug = $1
+            """, [slug]).fetchall()
+            neighbors = [r[0] for r in rows]
+            self._neighbor_cache[slug] = neighbors
+        return neighbors
+
+    def _fetch_top_k(
+        self,
+        sql: str,
+        params: list,
+        limit: int,
+        exhausted: Optional[Callable[[list, int], bool]] = None
+    ) -> list:
+        """
+        Run a query whose last parameter is its top-K chunk count.
+
+        The nearest chunks can belong to a handful of notes, so grouping them
+        by note may leave fewer than limit rows. K then grows and the query
+        reruns; once K covers every chunk the result equals a full scan.
+        exhausted(results, k) reports that no larger K can add rows (e.g. the
+        candidates ran out under a distance cutoff). A rerun that adds no rows
+        goes straight to the full scan instead of growing K step by step.
+        """
+        if self._num_embeddings is None:
+            self._num_embeddings = self.conn.execute(
+                "SELECT count(*) FROM embeddings"
+            ).fetchone()[0]
+        k = limit * CANDIDATES_PER_RESULT
+        previous = -1
+        while True:
+            results = self.conn.execute(sql, [*params, k]).fetchall()
+            if len(results) >= limit or k >= self._num_embeddings:
+                return results
+            if exhausted is not None and exhausted(results, k):
+                return results
+            if len(results) <= previous:
+                k = self._num_embeddings
+            else:
+                k *= CANDIDATES_GROWTH
+            previous = len(results)
+
     def semantic_search(
         self,
         query: str,
@@ -80,42 +251,179 @@ class SecondBrainQuery:
             tags: Optional tag filter
 
         Returns:
-            List of matching notes with similarity scores
+            List of matching notes (best chunk of each) with similarity scores
         """
-        query_embedding = self.embedder.encode(query).tolist()
+        return self._semantic_search_embedding(self._encode_query(query), limit, tags)
 
-        sql = f"""
-            SELECT DISTINCT
-                n.title,
-                n.slug,
-                n.file_path,
-                c.content,
-                c.heading_context,
-                1 - array_cosine_distance(e.embedding, $1::FLOAT[{self.embedding_dim}]) as similarity
-            FROM embeddings e
-            JOIN chunks c ON c.chunk_id = e.chunk_id
-            JOIN notes n ON n.note_id = c.note_id
+    def semantic_search_batch(
+        self,
+        queries: List[str],
+        limit: int = 10,
+        tags: Optional[List[str]] = None
+    ) -> List[List[dict]]:
+        """
+        Run semantic search for several queries, encoding them in one batch.
+
+        Args:
+            queries: Natural language search queries
+            limit: Maximum results per query
+            tags: Optional tag filter
+
+        Returns:
+            One result list per query, in input order
         """
+        if not queries:
+            return []
+        query_embeddings = self._encode_queries(queries)
+
+        # Score every chunk against every query in one matrix product, then
+        # let DuckDB compute exact similarities for the top candidates only
+        chunk_ids, note_starts, matrix = self._embedding_matrix()
+        norms = np.linalg.norm(query_embeddings, axis=1, keepdims=True)
+        scores = matrix @ (query_embeddings / np.where(norms == 0, 1, norms)).T
 
         if tags:
-            tag_filters = " OR ".join([f"list_contains(n.tags, '{t}')" for t in tags])
-            sql += f" WHERE ({tag_filters})"
+            allowed = self.conn.execute("""
+                SELECT c.chunk_id
+                FROM chunks c
+                JOIN notes n ON n.note_id = c.note_id
+                WHERE list_has_any(n.tags, $1::VARCHAR[])
+            """, [list(tags)]).fetchall()
+            scores[~np.isin(chunk_ids, [r[0] for r in allowed])] = -np.inf
+
+        # Rank notes, not chunks: the best chunk of each note first, then the
+        # top notes, so a few long notes can't fill the whole candidate set.
+        # Candidates keep a margin over limit for the exact rescoring in SQL.
+        note_ends = np.append(note_starts[1:], len(chunk_ids))
+        batch = []
+        for j, embedding in enumerate(query_embeddings):
+            column = scores[:, j]
+            note_best = np.maximum.reduceat(column, note_starts) if len(column) else column
+            k = min(limit * CANDIDATES_PER_RESULT, len(note_best))
+            top = np.argpartition(-note_best, k - 1)[:k] if 0 < k < len(note_best) else np.arange(k)
+            top = top[np.isfinite(note_best[top])]
+            best_chunks = [
+                note_starts[i] + np.argmax(column[note_starts[i]:note_ends[i]]) for i in top
+            ]
+            batch.append(self._semantic_search_embedding(
+                embedding, limit, tags, candidate_ids=chunk_ids[best_chunks].tolist()
+            ))
+        return batch
+
+    def _embedding_matrix(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        All chunk ids, the offset where each note's chunks start, and the
+        L2-normalized embeddings as an (N, dim) matrix, grouped by note.
 
-        sql += " ORDER BY similarity DESC LIMIT $2"
+        Loaded on first use and kept for the session, so a batch of queries
+        is scored with one BLAS matrix product instead of a scan per query.
+        """
+        if self._matrix is None:
+            data = self.conn.execute("""
+                SELECT e.chunk_id, c.note_id, e.embedding
+                FROM embeddings e
+                JOIN chunks c ON c.chunk_id = e.chunk_id
+                ORDER BY c.note_id, e.chunk_id
+            """).fetchnumpy()
+            chunk_ids = np.asarray(data['chunk_id'])
+            note_ids = np.asarray(data['note_id'])
+            note_starts = np.flatnonzero(np.r_[True, note_ids[1:] != note_ids[:-1]]) \
+                if len(note_ids) else np.empty(0, dtype=np.intp)
+            if len(chunk_ids):
+                matrix = np.stack(data['embedding']).astype(np.float32, copy=False)
+            else:
+                matrix = np.empty((0, self.embedding_dim), dtype=np.float32)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            self._matrix = (chunk_ids, note_starts, matrix / np.where(norms == 0, 1, norms))
+        return self._matrix
+
+    def _semantic_search_embedding(
+        self,
+        query_embedding: np.ndarray,
+        limit: int,
+        tags: Optional[List[str]],
+        candidate_ids: Optional[List[int]] = None
+    ) -> List[dict]:
+        """
+        Semantic search for an already encoded query.
 
-        results = self.conn.execute(sql, [query_embedding, limit]).fetchall()
+        Only the nearest limit * CANDIDATES_PER_RESULT chunks are scored (or
+        the given candidate_ids), widened until they cover limit notes; a tag
+        filter falls back to scoring all chunks so the filter can't empty the
+        candidate set.
+        """
+        params = ('semantic', limit, tuple(tags) if tags else None)
+        cached = self._result_cache.get(query_embedding, params)
+        if cached is not None:
+            return cached
+
+        top_k = candidate_ids is None and not tags
+        if candidate_ids is not None:
+            source = """(SELECT unnest($4::INTEGER[]) as chunk_id) cand
+                JOIN embeddings e ON e.chunk_id = cand.chunk_id"""
+            extra_params = [candidate_ids]
+        elif top_k:
+            # Nearest chunks first (HNSW index scan), then one per note below
+            source = f"""(
+                    SELECT chunk_id, embedding
+                    FROM embeddings
+                    ORDER BY array_cosine_distance(embedding, $1::FLOAT[{self.embedding_dim}])
+                    LIMIT $4
+                ) e"""
+            extra_params = []
+        else:
+            # Tag filter has to apply before the top-K, so scan all chunks
+            source = "embeddings e"
+            extra_params = []
 
-        return [
+        sql = f"""
+            SELECT
+                title,
+                slug,
+                file_path,
+                content_snippet,
+                heading_context,
+                round(score::DOUBLE, 4) as similarity
+            FROM (
+                -- Best-matching chunk per note
+                SELECT DISTINCT ON (n.note_id)
+                    n.title,
+                    n.slug,
+                    n.file_path,
+                    {self._snippet_sql} as content_snippet,
+                    c.heading_context,
+                    array_cosine_similarity(e.embedding, $1::FLOAT[{self.embedding_dim}]) as score
+                FROM {source}
+                JOIN chunks c ON c.chunk_id = e.chunk_id
+                JOIN notes n ON n.note_id = c.note_id
+                WHERE ($3::VARCHAR[] IS NULL OR list_has_any(n.tags, $3::VARCHAR[]))
+                ORDER BY n.note_id, score DESC
+            )
+            ORDER BY score DESC
+            LIMIT $2
+        """
+
+        # Tags are bound as a list parameter, so one statement covers the
+        # filtered and unfiltered case and tag values are never spliced into SQL
+        sql_params = [query_embedding, limit, list(tags) if tags else None, *extra_params]
+        if top_k:
+            results = self._fetch_top_k(sql, sql_params, limit)
+        else:
+            results = self.conn.execute(sql, sql_params).fetchall()
+
+        matches = [
             {
                 'title': r[0],
                 'slug': r[1],
                 'file_path': r[2],
-                'snippet': r[3][:300] + "..." if len(r[3]) > 300 else r[3],
+                'snippet': r[3],
                 'heading': r[4],
-                'similarity': round(r[5], 4)
+                'similarity': r[5]
             }
             for r in results
         ]
+        self._result_cache.put(query_embedding, params, matches)
+        return matches
 
     def find_backlinks(self, slug: str) -> List[dict]:
         """
@@ -127,8 +435,10 @@ class SecondBrainQuery:
         Returns:
             List of notes linking to this note
         """
+        # No DISTINCT needed: slugs are unique and the link extractor already
+        # dedupes (source, target, link_text) per note
         sql = """
-            SELECT DISTINCT
+            SELECT
                 n.title,
                 n.slug,
                 l.link_text,
@@ -160,31 +470,38 @@ class SecondBrainQuery:
             hops: Maximum link distance (1-3)
 
         Returns:
-            Dict with notes organized by hop distance
+            Dict with notes organized by (shortest) hop distance
         """
         hops = min(max(hops, 1), 3)
 
-        sql = """
-            WITH RECURSIVE connected(slug, hop, path) AS (
-                SELECT target_slug, 1, ARRAY[source_slug, target_slug]
-                FROM links WHERE source_slug = $1
-
-                UNION
-
-                SELECT l.target_slug, c.hop + 1, list_append(c.path, l.target_slug)
-                FROM connected c
-                JOIN links l ON l.source_slug = c.slug
-                WHERE c.hop < $2
-                  AND NOT list_contains(c.path, l.target_slug)
-            )
-            SELECT DISTINCT n.title, c.slug, c.hop
-            FROM connected c
-            JOIN notes n ON n.slug = c.slug
-            WHERE c.slug != $1
-            ORDER BY c.hop, n.title
-        """
-
-        results = self.conn.execute(sql, [slug, hops]).fetchall()
+        # Breadth-first over outgoing links: one query per hop, with the
+        # visited set kept in Python so each note is reported once, at its
+        # shortest distance
+        visited = {slug}
+        frontier = [slug]
+        found_slugs: List[str] = []
+        found_hops: List[int] = []
+        for hop in range(1, hops + 1):
+            if not frontier:
+                break
+            rows = self.conn.execute("""
+                SELECT DISTINCT target_slug
+                FROM links
+                WHERE source_slug IN (SELECT unnest($1::VARCHAR[]))
+            """, [frontier]).fetchall()
+            frontier = [r[0] for r in rows if r[0] not in visited]
+            visited.update(frontier)
+            found_slugs.extend(frontier)
+            found_hops.extend([hop] * len(frontier))
+
+        results = self.conn.execute("""
+            SELECT n.title, f.slug, f.hop
+            FROM (
+                SELECT unnest($1::VARCHAR[]) as slug, unnest($2::INTEGER[]) as hop
+            ) f
+            JOIN notes n ON n.slug = f.slug
+            ORDER BY f.hop, n.title
+        """, [found_slugs, found_hops]).fetchall()
 
         connections = {}
         for title, connected_slug, hop in results:
@@ -217,49 +534,89 @@ class SecondBrainQuery:
         Returns:
             List of unlinked but semantically related notes
         """
-        query_embedding = self.embedder.encode(query).tolist()
+        query_embedding = self._encode_query(query)
+        params = ('hidden', seed_slug, limit)
+        cached = self._result_cache.get(query_embedding, params)
+        if cached is not None:
+            return cached
 
         sql = f"""
-            WITH semantic_similar AS (
-                SELECT DISTINCT
+            WITH excluded AS (
+                -- The seed and its direct links never reach the top-K
+                SELECT c.chunk_id
+                FROM chunks c
+                JOIN notes n ON n.note_id = c.note_id
+                WHERE n.slug = $2 OR list_contains($4::VARCHAR[], n.slug)
+            ),
+            candidates AS (
+                -- Only chunks under the cutoff can put a group over it, so
+                -- fewer than K candidates means a larger K can't add rows
+                SELECT chunk_id
+                FROM embeddings
+                WHERE chunk_id NOT IN (SELECT chunk_id FROM excluded)
+                  AND array_cosine_distance(embedding, $1::FLOAT[{self.embedding_dim}]) < 0.6
+                ORDER BY array_cosine_distance(embedding, $1::FLOAT[{self.embedding_dim}])
+                LIMIT $5
+            ),
+            candidate_groups AS (
+                SELECT DISTINCT c.note_id, c.content
+                FROM candidates cand
+                JOIN chunks c ON c.chunk_id = cand.chunk_id
+            ),
+            chunk_distances AS (
+                -- Distance computed once per chunk, then aggregated below.
+                -- Every chunk of a candidate group is scored so MAX/MIN match
+                -- a full scan for the notes that make it into the top-K.
+                SELECT
                     n.slug,
                     n.title,
                     c.content,
-                    MIN(1 - array_cosine_distance(e.embedding, $1::FLOAT[{self.embedding_dim}])) as similarity
-                FROM embeddings e
-                JOIN chunks c ON c.chunk_id = e.chunk_id
+                    {self._snippet_sql} as content_snippet,
+                    array_cosine_distance(e.embedding, $1::FLOAT[{self.embedding_dim}]) as distance
+                FROM candidate_groups g
+                JOIN chunks c ON c.note_id = g.note_id AND c.content = g.content
+                JOIN embeddings e ON e.chunk_id = c.chunk_id
                 JOIN notes n ON n.note_id = c.note_id
-                GROUP BY n.slug, n.title, c.content
-                HAVING MIN(array_cosine_distance(e.embedding, $1::FLOAT[{self.embedding_dim}])) < 0.6
             ),
-            direct_links AS (
-                SELECT DISTINCT target_slug as slug FROM links WHERE source_slug = $2
-                UNION
-                SELECT DISTINCT source_slug as slug FROM links WHERE target_slug = $2
+            semantic_similar AS (
+                SELECT
+                    slug,
+                    title,
+                    content_snippet,
+                    1 - MAX(distance) as similarity
+                FROM chunk_distances
+                GROUP BY slug, title, content, content_snippet
+                HAVING MIN(distance) < 0.6
             )
             SELECT
-                ss.title,
-                ss.slug,
-                ss.content,
-                ss.similarity
-            FROM semantic_similar ss
-            LEFT JOIN direct_links dl ON ss.slug = dl.slug
-            WHERE dl.slug IS NULL AND ss.slug != $2
-            ORDER BY ss.similarity DESC
+                title,
+                slug,
+                content_snippet,
+                round(similarity::DOUBLE, 4) as similarity,
+                (SELECT count(*) FROM candidates) as candidate_count
+            FROM semantic_similar
+            ORDER BY similarity DESC
             LIMIT $3
         """
 
-        results = self.conn.execute(sql, [query_embedding, seed_slug, limit]).fetchall()
+        # Any candidate puts its own group over the cutoff, so an empty
+        # result means there were no candidates at all
+        results = self._fetch_top_k(
+            sql, [query_embedding, seed_slug, limit, self._direct_neighbors(seed_slug)], limit,
+            exhausted=lambda rows, k: not rows or rows[0][4] < k
+        )
 
-        return [
+        matches = [
             {
                 'title': r[0],
                 'slug': r[1],
-                'snippet': r[2][:300] + "..." if len(r[2]) > 300 else r[2],
-                'similarity': round(r[3], 4)
+                'snippet': r[2],
+                'similarity': r[3]
             }
             for r in results
         ]
+        self._result_cache.put(query_embedding, params, matches)
+        return matches
 
     def find_shared_tags(
         self,
@@ -334,55 +691,96 @@ class SecondBrainQuery:
         Returns:
             List of notes with combined semantic + graph scores
         """
-        query_embedding = self.embedder.encode(query).tolist()
+        query_embedding = self._encode_query(query)
+        params = ('graph_boosted', seed_slug, limit, boost_factor)
+        cached = self._result_cache.get(query_embedding, params)
+        if cached is not None:
+            return cached
 
         sql = f"""
-            WITH semantic_matches AS (
+            WITH graph_connected AS (
+                SELECT unnest($5::VARCHAR[]) as slug
+            ),
+            seed_chunks AS (
+                SELECT c.chunk_id
+                FROM chunks c
+                JOIN notes n ON n.note_id = c.note_id
+                WHERE n.slug = $2
+            ),
+            candidates AS (
+                (
+                    -- The seed is dropped before the cut so its own chunks
+                    -- can't crowd other notes out of the top-K
+                    SELECT chunk_id
+                    FROM embeddings
+                    WHERE chunk_id NOT IN (SELECT chunk_id FROM seed_chunks)
+                    ORDER BY array_cosine_distance(embedding, $1::FLOAT[{self.embedding_dim}])
+                    LIMIT $6
+                )
+                UNION
+                -- Linked notes are always scored, so the boost can lift them
+                -- even when they fall outside the nearest chunks
+                SELECT c.chunk_id
+                FROM graph_connected gc
+                JOIN notes n ON n.slug = gc.slug
+                JOIN chunks c ON c.note_id = n.note_id
+            ),
+            semantic_matches AS (
                 SELECT DISTINCT ON (n.slug)
                     n.slug,
                     n.title,
-                    c.content,
+                    {self._snippet_sql} as content_snippet,
                     c.heading_context,
-                    1 - array_cosine_distance(e.embedding, $1::FLOAT[{self.embedding_dim}]) as similarity
-                FROM embeddings e
+                    array_cosine_similarity(e.embedding, $1::FLOAT[{self.embedding_dim}]) as similarity
+                FROM candidates cand
+                JOIN embeddings e ON e.chunk_id = cand.chunk_id
                 JOIN chunks c ON c.chunk_id = e.chunk_id
                 JOIN notes n ON n.note_id = c.note_id
                 ORDER BY n.slug, similarity DESC
             ),
-            graph_connected AS (
-                SELECT DISTINCT target_slug as slug FROM links WHERE source_slug = $2
-                UNION
-                SELECT DISTINCT source_slug as slug FROM links WHERE target_slug = $2
+            scored AS (
+                SELECT
+                    sm.*,
+                    CASE WHEN gc.slug IS NOT NULL THEN true ELSE false END as is_linked,
+                    sm.similarity * CASE WHEN gc.slug IS NOT NULL THEN $3 ELSE 1.0 END as score
+                FROM semantic_matches sm
+                LEFT JOIN graph_connected gc ON gc.slug = sm.slug
+                WHERE sm.slug != $2
             )
             SELECT
-                sm.title,
-                sm.slug,
-                sm.content,
-                sm.heading_context,
-                sm.similarity,
-                CASE WHEN gc.slug IS NOT NULL THEN true ELSE false END as is_linked,
-                sm.similarity * CASE WHEN gc.slug IS NOT NULL THEN $3 ELSE 1.0 END as final_score
-            FROM semantic_matches sm
-            LEFT JOIN graph_connected gc ON gc.slug = sm.slug
-            WHERE sm.slug != $2
-            ORDER BY final_score DESC
+                title,
+                slug,
+                content_snippet,
+                heading_context,
+                round(similarity::DOUBLE, 4) as similarity,
+                is_linked,
+                round(score, 4) as final_score
+            FROM scored
+            ORDER BY score DESC
             LIMIT $4
         """
 
-        results = self.conn.execute(sql, [query_embedding, seed_slug, boost_factor, limit]).fetchall()
+        results = self._fetch_top_k(
+            sql, [
+                query_embedding, seed_slug, boost_factor, limit,
+                self._direct_neighbors(seed_slug)
+            ], limit
+        )
 
-        return [
+        matches = [
             {
                 'title': r[0],
                 'slug': r[1],
-                'snippet': r[2][:300] + "..." if len(r[2]) > 300 else r[2],
+                'snippet': r[2],
                 'heading': r[3],
-                'similarity': round(r[4], 4),
+                'similarity': r[4],
                 'is_linked': r[5],
-                'final_score': round(r[6], 4)
+                'final_score': r[6]
             }
             for r in results
         ]
+        self._result_cache.put(query_embedding, params, matches)
+        return matches
 
     def execute_sql(self, query: str) -> str:
         """Execute raw SQL query (read-only)."""
@@ -391,14 +789,19 @@ class SecondBrainQuery:
             return "Error: Only SELECT queries are allowed."
 
         try:
-            result = self.conn.execute(query).fetchdf()
-            return result.to_markdown(index=False)
+            # Rows go straight to tabulate (what DataFrame.to_markdown calls)
+            # without building a pandas DataFrame first
+            result = self.conn.execute(query)
+            rows = result.fetchall()
+            headers = [column[0] for column in result.description]
+            return tabulate(rows, headers=headers, tablefmt='pipe')
         except Exception as e:
             return f"Query error: {str(e)}"
 
     def close(self):
         """Close database connection."""
         self.conn.close()
+        self._disk_query_cache.close()
 
 
 def format_semantic_results(results: List[dict]) -> str:
@@ -498,6 +901,79 @@ def format_graph_boosted(results: List[dict], query: str, seed: str) -> str:
     return "\n".join(output)
 
 
+def run_command(qb: SecondBrainQuery, args: argparse.Namespace):
+    """Run one parsed command and print its formatted result."""
+    if args.command == "semantic":
+        tags = args.tags.split(',') if args.tags else None
+        if args.query == "-":
+            # One query per line on stdin, encoded as a single batch
+            queries = [line.strip() for line in sys.stdin if line.strip()]
+            batch = qb.semantic_search_batch(queries, limit=args.limit, tags=tags)
+            for query, results in zip(queries, batch):
+                print(f"\n# {query}")
+                print(format_semantic_results(results))
+        else:
+            results = qb.semantic_search(args.query, limit=args.limit, tags=tags)
+            print(format_semantic_results(results))
+
+    elif args.command == "backlinks":
+        results = qb.find_backlinks(args.query)
+        print(format_backlinks(results, args.query))
+
+    elif args.command == "connections":
+        results = qb.find_connections(args.query, hops=args.hops)
+        print(format_connections(results, args.query, args.hops))
+
+    elif args.command == "hidden":
+        if not args.seed:
+            print("Error: --seed is required for 'hidden' command")
+            sys.exit(1)
+        results = qb.find_hidden_connections(args.query, args.seed, limit=args.limit)
+        print(format_hidden(results, args.query, args.seed))
+
+    elif args.command == "shared-tags":
+        results = qb.find_shared_tags(args.query, min_shared=args.min_shared, limit=args.limit)
+        print(format_shared_tags(results, args.query, args.min_shared))
+
+    elif args.command == "graph-boosted":
+        if not args.seed:
+            print("Error: --seed is required for 'graph-boosted' command")
+            sys.exit(1)
+        results = qb.graph_boosted_search(args.query, args.seed, limit=args.limit, boost_factor=args.boost)
+        print(format_graph_boosted(results, args.query, args.seed))
+
+    elif args.command == "sql":
+        result = qb.execute_sql(args.query)
+        print(result)
+
+
+def serve(qb: SecondBrainQuery, parser: argparse.ArgumentParser):
+    """
+    Answer commands read from stdin, one per line, in a single process.
+
+    Each line takes the same arguments as the CLI (e.g. `semantic "data
+    modeling" --limit 5`). The connection, caches and embedding model are
+    loaded once and reused, so only the first semantic query pays for them.
+    """
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            line_args = parser.parse_args(shlex.split(line))
+            if line_args.command == "serve" or line_args.query in (None, "-"):
+                print("Error: each line needs a command and a query")
+                continue
+            run_command(qb, line_args)
+        except SystemExit:
+            # argparse errors and missing --seed; keep serving
+            pass
+        except (ValueError, duckdb.Error) as e:
+            print(f"Error: {e}")
+        finally:
+            sys.stdout.flush()
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Query Second Brain knowledge base",
@@ -511,16 +987,18 @@ Examples:
     python scripts/query.py shared-tags "data-contracts" --min-shared 2
     python scripts/query.py graph-boosted "data modeling" --seed "data-contracts"
     python scripts/query.py sql "SELECT title, slug FROM notes LIMIT 10"
+    python scripts/query.py serve < commands.txt
         """
     )
     parser.add_argument(
         "command",
-        choices=["semantic", "backlinks", "connections", "hidden", "shared-tags", "graph-boosted", "sql"],
+        choices=["semantic", "backlinks", "connections", "hidden", "shared-tags", "graph-boosted", "sql", "serve"],
         help="Query type"
     )
     parser.add_argument(
         "query",
-        help="Search query or note slug"
+        nargs="?",
+        help="Search query or note slug ('-' reads semantic queries from stdin)"
     )
     parser.add_argument(
         "--db",
@@ -560,7 +1038,37 @@ Examples:
         help="Boost factor for linked notes in 'graph-boosted' command (default: 1.2)"
     )
 
+    parser.add_argument(
+        "--backend",
+        choices=["torch", "onnx"],
+        default="torch",
+        help="Query encoding backend; 'onnx' needs sentence-transformers[onnx] (default: torch)"
+    )
+    parser.add_argument(
+        "--onnx-file",
+        help="ONNX file within the model, e.g. onnx/model_qint8_avx2.onnx (with --backend onnx)"
+    )
+    parser.add_argument(
+        "--torch-threads",
+        type=int,
+        default=None,
+        help="PyTorch CPU threads for query encoding (default: one per physical core)"
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=None,
+        help="DuckDB worker threads (default: one per CPU core)"
+    )
+    parser.add_argument(
+        "--memory-limit",
+        default=None,
+        help="DuckDB memory limit, e.g. 2GB (default: 80%% of RAM)"
+    )
+
     args = parser.parse_args()
+    if args.command != "serve" and args.query is None:
+        parser.error(f"'{args.command}' requires a query")
 
     # Resolve database path
     db_path = args.db
@@ -572,44 +1080,20 @@ Examples:
         print("Run 'python scripts/ingest.py' first to create the database.")
         sys.exit(1)
 
-    qb = SecondBrainQuery(db_path)
+    qb = SecondBrainQuery(
+        db_path,
+        backend=args.backend,
+        onnx_file=args.onnx_file,
+        torch_threads=args.torch_threads,
+        threads=args.threads,
+        memory_limit=args.memory_limit
+    )
 
     try:
-        if args.command == "semantic":
-            tags = args.tags.split(',') if args.tags else None
-            results = qb.semantic_search(args.query, limit=args.limit, tags=tags)
-            print(format_semantic_results(results))
-
-        elif args.command == "backlinks":
-            results = qb.find_backlinks(args.query)
-            print(format_backlinks(results, args.query))
-
-        elif args.command == "connections":
-            results = qb.find_connections(args.query, hops=args.hops)
-            print(format_connections(results, args.query, args.hops))
-
-        elif args.command == "hidden":
-            if not args.seed:
-                print("Error: --seed is required for 'hidden' command")
-                sys.exit(1)
-            results = qb.find_hidden_connections(args.query, args.seed, limit=args.limit)
-            print(format_hidden(results, args.query, args.seed))
-
-        elif args.command == "shared-tags":
-            results = qb.find_shared_tags(args.query, min_shared=args.min_shared, limit=args.limit)
-            print(format_shared_tags(results, args.query, args.min_shared))
-
-        elif args.command == "graph-boosted":
-            if not args.seed:
-                print("Error: --seed is required for 'graph-boosted' command")
-                sys.exit(1)
-            results = qb.graph_boosted_search(args.query, args.seed, limit=args.limit, boost_factor=args.boost)
-            print(format_graph_boosted(results, args.query, args.seed))
-
-        elif args.command == "sql":
-            result = qb.execute_sql(args.query)
-            print(result)
-
+        if args.command == "serve":
+            serve(qb, parser)
+        else:
+            run_command(qb, args)
     finally:
         qb.close()
 
@@ -1,16 +1,36 @@
 """Bulk ingestion pipeline for Second Brain notes."""
 import duckdb
+import hashlib
+import numpy as np
+import pandas as pd
 from pathlib import Path
-from typing import Generator, List, Dict, Any
+from typing import DefaultDict, Generator, List, Dict, Any, Optional, Tuple
 import json
+import multiprocessing
+import os
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import date, datetime
+from functools import partial
 from tqdm import tqdm
 
 from ..parsers.markdown_parser import parse_note, ParsedNote
-from ..parsers.link_extractor import extract_wikilinks
-from ..parsers.chunker import chunk_markdown
+from ..parsers.link_extractor import extract_wikilinks, WikiLink
+from ..parsers.chunker import chunk_markdown, Chunk
 from ..embeddings.embedder import EmbeddingGenerator
-from .schema import init_database, create_hnsw_index, drop_all_tables
+from .schema import (
+    init_database, create_schema, create_secondary_indexes, create_hnsw_index,
+    drop_all_tables, get_embedding_dim
+)
+
+# Embedding rows per INSERT in Phase 3 (bounds the DataFrame built per batch)
+EMBEDDING_INSERT_BATCH = 10_000
+
+# Files per parser task in Phase 1, and tasks in flight per worker process.
+# Parsed notes wait in memory until the main process has inserted them, so
+# only this many are submitted ahead of the DuckDB inserts.
+PARSE_TASK_FILES = 16
+PARSE_TASKS_PER_WORKER = 4
 
 
 class DateTimeEncoder(json.JSONEncoder):
@@ -21,32 +41,170 @@ class DateTimeEncoder(json.JSONEncoder):
         return super().default(obj)
 
 
+def parse_file(
+    file_path: Path,
+    vault_root: Path
+) -> Tuple[
+    Path,
+    Optional[Tuple[ParsedNote, List[WikiLink], List[Chunk], List[Tuple[str, str]]]],
+    Optional[str]
+]:
+    """
+    Parse one note and extract its links and chunks.
+
+    Module-level so it can run in worker processes. Links use the note's
+    own slug as source; the caller replaces it after slug deduplication.
+    The text each chunk is embedded with (title and heading context
+    prepended) and its SHA-256 are computed here too, so that work runs
+    in parallel as well.
+
+    Returns:
+        (file_path, (note, links, chunks, [(sha256, embed_text), ...]), None)
+        on success, (file_path, None, error message) on failure
+    """
+    try:
+        note = parse_note(file_path, vault_root)
+        links = extract_wikilinks(note.content, note.slug)
+        chunks = chunk_markdown(note.content)
+        embed_inputs = []
+        for chunk in chunks:
+            text = EmbeddingGenerator.prepare_chunk_for_embedding(
+                chunk.content, chunk.heading_context, note.title
+            )
+            embed_inputs.append((hashlib.sha256(text.encode('utf-8')).hexdigest(), text))
+        return file_path, (note, links, chunks, embed_inputs), None
+    except Exception as e:
+        return file_path, None, str(e)
+
+
+def parse_files(file_paths: List[Path], vault_root: Path) -> List[tuple]:
+    """Run parse_file over a batch of files (one worker task per batch)."""
+    return [parse_file(file_path, vault_root) for file_path in file_paths]
+
+
+def _parse_in_pool(
+    pool: ProcessPoolExecutor,
+    files: List[Path],
+    vault_root: Path,
+    max_in_flight: int
+) -> Generator[tuple, None, None]:
+    """
+    Yield parse_file results in file order, keeping at most max_in_flight
+    batches submitted but not yet consumed (Executor.map would submit every
+    file up front and buffer all results).
+    """
+    in_flight = deque()
+    for start in range(0, len(files), PARSE_TASK_FILES):
+        if len(in_flight) >= max_in_flight:
+            yield from in_flight.popleft().result()
+        in_flight.append(
+            pool.submit(parse_files, files[start:start + PARSE_TASK_FILES], vault_root)
+        )
+    while in_flight:
+        yield from in_flight.popleft().result()
+
+
 class SecondBrainIngester:
     """Ingestion pipeline for Obsidian vault into DuckDB."""
 
-    def __init__(self, db_path: str = 'second_brain.duckdb', model_name: str = None):
+    def __init__(
+        self,
+        db_path: str = 'second_brain.duckdb',
+        model_name: str = None,
+        threads: int = None,
+        memory_limit: str = None,
+        backend: str = 'torch',
+        onnx_file: str = None,
+        torch_threads: int = None
+    ):
         """
         Initialize ingester with database connection.
 
         Args:
             db_path: Path to DuckDB database file
             model_name: Embedding model name (default from schema.DEFAULT_MODEL)
+            threads: DuckDB worker threads (default: one per core)
+            memory_limit: DuckDB memory limit, e.g. '8GB' (default: 80% of RAM)
+            backend: sentence-transformers backend ('torch' or 'onnx')
+            onnx_file: ONNX file within the model (backend 'onnx' only)
+            torch_threads: PyTorch CPU threads for embedding (default: torch's)
         """
         from .schema import DEFAULT_MODEL
         self.db_path = db_path
         self.model_name = model_name or DEFAULT_MODEL
+        self.threads = threads
+        self.memory_limit = memory_limit
+        self.backend = backend
+        self.onnx_file = onnx_file
+        self.torch_threads = torch_threads
+        # Recorded per embedding row; a different backend (e.g. quantized
+        # ONNX) produces slightly different vectors, so they aren't reused
+        self.embedding_source = self.model_name
+        if backend != 'torch':
+            self.embedding_source = f"{self.model_name}:{backend}:{onnx_file or ''}"
         self.conn = None
         self.embedder = None
 
     def _ensure_connection(self):
         """Ensure database connection is open."""
         if self.conn is None:
-            self.conn = init_database(self.db_path, self.model_name)
+            self.conn = init_database(
+                self.db_path,
+                self.model_name,
+                threads=self.threads,
+                memory_limit=self.memory_limit
+            )
 
     def _ensure_embedder(self):
         """Ensure embedding model is loaded."""
         if self.embedder is None:
-            self.embedder = EmbeddingGenerator(self.model_name)
+            self.embedder = EmbeddingGenerator(
+                self.model_name,
+                backend=self.backend,
+                onnx_file=self.onnx_file,
+                torch_threads=self.torch_threads
+            )
+
+    def _load_existing_embeddings(self) -> Dict[str, np.ndarray]:
+        """
+        Load embeddings from a previous ingestion, keyed by content hash.
+
+        Only rows produced by the current model and backend are returned. Databases
+        created before content hashes were stored yield an empty dict.
+        """
+        try:
+            rows = self.conn.execute("""
+                SELECT content_sha256, embedding
+                FROM embeddings
+                WHERE content_sha256 IS NOT NULL AND model_name = ?
+            """, [self.embedding_source]).fetchall()
+        except duckdb.Error:
+            return {}
+        return {sha: np.asarray(emb, dtype=np.float32) for sha, emb in rows}
+
+    def _bulk_insert(self, table: str, rows: List[Dict[str, Any]], columns: List[str]):
+        """
+        Insert rows into a table with a single statement.
+
+        The rows are wrapped in a DataFrame and registered with DuckDB, which
+        scans it column-wise, so the per-row parameter binding of
+        `execute`/`executemany` is avoided entirely.
+
+        Args:
+            table: Target table name
+            rows: Row dicts (extra keys are ignored)
+            columns: Columns to insert, in table order
+        """
+        if not rows:
+            return
+        column_list = ', '.join(columns)
+        self.conn.register('bulk_rows', pd.DataFrame(rows, columns=columns))
+        try:
+            self.conn.execute(
+                f"INSERT INTO {table} ({column_list}) SELECT {column_list} FROM bulk_rows"
+            )
+        finally:
+            self.conn.unregister('bulk_rows')
 
     def scan_vault(self, vault_path: Path) -> Generator[Path, None, None]:
         """
@@ -54,264 +212,256 @@ class SecondBrainIngester:
 
         Skips hidden files/folders and non-markdown files.
         """
-        for md_file in vault_path.rglob('*.md'):
-            # Skip hidden files and folders
-            if any(part.startswith('.') for part in md_file.parts):
-                continue
-            yield md_file
+        for root, dirs, files in os.walk(vault_path):
+            # Prune hidden folders (.git, .obsidian, .trash) in place so
+            # os.walk never descends into them
+            dirs[:] = [d for d in dirs if not d.startswith('.')]
+            for name in files:
+                if name.endswith('.md') and not name.startswith('.'):
+                    yield Path(root) / name
 
     def ingest_vault(
         self,
         vault_path: str,
         batch_size: int = 100,
-        embedding_batch_size: int = 64
+        embedding_batch_size: int = 64,
+        workers: Optional[int] = None
     ):
         """
         Main ingestion pipeline.
 
-        1. Parse all markdown files
-        2. Extract links
-        3. Chunk content
-        4. Generate embeddings
-        5. Bulk insert into DuckDB
+        1. Parse all markdown files, extract links and chunk content,
+           inserting notes, links and chunks every batch_size notes
+        2. Generate embeddings for new or changed chunks
+        3. Insert embeddings and hyperedges
+        4. Build the secondary and HNSW indexes
 
         Args:
             vault_path: Path to Obsidian vault root
-            batch_size: Notes to process before database commit
+            batch_size: Notes buffered per insert into notes, links and chunks
             embedding_batch_size: Texts per embedding batch
+            workers: Parser processes for Phase 1 (default: CPU count, 1 = in-process)
         """
-        self._ensure_connection()
+        workers = workers or os.cpu_count() or 1
 
+        # Check the vault before opening (and so creating) the database
         vault = Path(vault_path)
-        if not vault.exists():
+        if not vault.is_dir():
             raise ValueError(f"Vault path does not exist: {vault_path}")
 
+        self._ensure_connection()
+
+        # Keep embeddings of unchanged chunks before the clean start
+        existing_embeddings = self._load_existing_embeddings()
+
         # Clean start - drop existing tables
         drop_all_tables(self.conn)
-        self.conn = init_database(self.db_path, self.model_name)
+        create_schema(self.conn, self.model_name, get_embedding_dim(self.model_name))
 
         files = list(self.scan_vault(vault))
         print(f"Found {len(files)} markdown files")
 
+        # Rows are buffered per batch of notes and flushed to DuckDB, so the
+        # full note and chunk contents are never held in memory at once.
+        # Per chunk only the content hash is kept (plus the text of chunks
+        # that still need encoding); per note only what hyperedges need.
         notes_data: List[Dict[str, Any]] = []
         links_data: List[Dict[str, Any]] = []
         chunks_data: List[Dict[str, Any]] = []
+        content_hashes: List[str] = []  # Indexed by chunk_id - 1
+        missing: Dict[str, str] = {}  # content hash -> text to encode
+        hyperedge_map: DefaultDict[tuple, List[int]] = defaultdict(list)  # (type, value) -> [note_ids]
 
         note_id = 0
         chunk_id = 0
         link_id = 0
-        seen_slugs: Dict[str, int] = {}  # Track slug occurrences for deduplication
+        seen_slugs: DefaultDict[str, int] = defaultdict(int)  # Track slug occurrences for deduplication
 
-        # Phase 1: Parse and extract
-        print("\nPhase 1: Parsing notes and extracting links...")
-        for file_path in tqdm(files, desc="Parsing"):
-            try:
-                note = parse_note(file_path, vault)
-                note_id += 1
-
-                # Deduplicate slugs by appending counter if needed
-                base_slug = note.slug
-                if base_slug in seen_slugs:
-                    seen_slugs[base_slug] += 1
-                    slug = f"{base_slug}-{seen_slugs[base_slug]}"
-                else:
-                    seen_slugs[base_slug] = 0
-                    slug = base_slug
-
-                # Note data - use custom encoder for frontmatter dates
-                notes_data.append({
-                    'note_id': note_id,
-                    'file_path': note.file_path,
-                    'slug': slug,
-                    'title': note.title,
-                    'content': note.content,
-                    'frontmatter': json.dumps(note.frontmatter, cls=DateTimeEncoder),
-                    'tags': note.tags,
-                    'aliases': note.aliases,
-                    'created_date': note.created_date,
-                    'modified_date': note.modified_date,
-                    'word_count': len(note.content.split())
-                })
-
-                # Links - use the deduplicated slug as source
-                links = extract_wikilinks(note.content, slug)
-                for link in links:
-                    link_id += 1
-                    links_data.append({
-                        'link_id': link_id,
-                        'source_slug': link.source_slug,
-                        'target_slug': link.target_slug,
-                        'link_text': link.link_text,
-                        'link_type': link.link_type
-                    })
+        def flush():
+            self._bulk_insert('notes', notes_data, [
+                'note_id', 'file_path', 'slug', 'title', 'content', 'frontmatter',
+                'tags', 'aliases', 'created_date', 'modified_date', 'word_count'
+            ])
+            self._bulk_insert('links', links_data, [
+                'link_id', 'source_slug', 'target_slug', 'link_text', 'link_type'
+            ])
+            self._bulk_insert('chunks', chunks_data, [
+                'chunk_id', 'note_id', 'chunk_index', 'content', 'content_snippet',
+                'heading_context', 'chunk_type', 'start_line', 'end_line'
+            ])
+            notes_data.clear()
+            links_data.clear()
+            chunks_data.clear()
 
-                # Chunks
-                chunks = chunk_markdown(note.content)
-                for i, chunk in enumerate(chunks):
-                    chunk_id += 1
-                    chunks_data.append({
-                        'chunk_id': chunk_id,
+        # Phase 1: Parse and extract (in worker processes; IDs and slug
+        # deduplication are assigned here in file order), writing notes,
+        # links and chunks every batch_size notes
+        print("\nPhase 1: Parsing notes and extracting links...")
+        self.conn.execute("BEGIN TRANSACTION")
+        # Spawned workers: forking copies whatever the caller holds (the
+        # embed server's ingest worker has a model loaded) and is unsafe
+        # in a multi-threaded process
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        ) as pool:
+            if workers > 1:
+                parsed_files = _parse_in_pool(
+                    pool, files, vault, workers * PARSE_TASKS_PER_WORKER
+                )
+            else:
+                parsed_files = map(partial(parse_file, vault_root=vault), files)
+
+            for file_path, parsed, error in tqdm(parsed_files, total=len(files), desc="Parsing"):
+                if parsed is None:
+                    print(f"\nError processing {file_path}: {error}")
+                    continue
+
+                try:
+                    note, links, chunks, embed_inputs = parsed
+                    note_id += 1
+
+                    # Deduplicate slugs by appending counter if needed
+                    base_slug = note.slug
+                    count = seen_slugs[base_slug]
+                    slug = f"{base_slug}-{count}" if count else base_slug
+                    seen_slugs[base_slug] = count + 1
+
+                    # Note data - use custom encoder for frontmatter dates
+                    notes_data.append({
                         'note_id': note_id,
-                        'chunk_index': i,
-                        'content': chunk.content,
-                        'heading_context': chunk.heading_context,
-                        'chunk_type': chunk.chunk_type,
-                        'start_line': chunk.start_line,
-                        'end_line': chunk.end_line,
-                        'note_title': note.title  # For embedding context
+                        'file_path': note.file_path,
+                        'slug': slug,
+                        'title': note.title,
+                        'content': note.content,
+                        'frontmatter': json.dumps(note.frontmatter, cls=DateTimeEncoder),
+                        'tags': note.tags,
+                        'aliases': note.aliases,
+                        'created_date': note.created_date,
+                        'modified_date': note.modified_date,
+                        'word_count': note.word_count
                     })
 
-            except Exception as e:
-                print(f"\nError processing {file_path}: {e}")
-                continue
-
-        print(f"\nParsed: {len(notes_data)} notes, {len(links_data)} links, {len(chunks_data)} chunks")
+                    # Links - use the deduplicated slug as source
+                    for link in links:
+                        link_id += 1
+                        links_data.append({
+                            'link_id': link_id,
+                            'source_slug': slug,
+                            'target_slug': link.target_slug,
+                            'link_text': link.link_text,
+                            'link_type': link.link_type
+                        })
+
+                    # Chunks
+                    for i, (chunk, (sha, text)) in enumerate(zip(chunks, embed_inputs)):
+                        chunk_id += 1
+                        chunks_data.append({
+                            'chunk_id': chunk_id,
+                            'note_id': note_id,
+                            'chunk_index': i,
+                            'content': chunk.content,
+                            'content_snippet': (
+                                chunk.content[:300] + "..."
+                                if len(chunk.content) > 300 else chunk.content
+                            ),
+                            'heading_context': chunk.heading_context,
+                            'chunk_type': chunk.chunk_type,
+                            'start_line': chunk.start_line,
+                            'end_line': chunk.end_line
+                        })
+
+                        # Only changed texts are kept for Phase 2; each
+                        # distinct text is encoded once
+                        content_hashes.append(sha)
+                        if sha not in existing_embeddings:
+                            missing.setdefault(sha, text)
+
+                    # Tag hyperedges
+                    for tag in note.tags:
+                        hyperedge_map[('tag', tag.lower().strip('#'))].append(note_id)
+
+                    # Folder hyperedge (parent folder path)
+                    if '/' in note.file_path:
+                        folder = '/'.join(note.file_path.split('/')[:-1])
+                        if folder:
+                            hyperedge_map[('folder', folder)].append(note_id)
+
+                    # Alias hyperedges
+                    for alias in note.aliases:
+                        hyperedge_map[('alias', alias.lower())].append(note_id)
+
+                except Exception as e:
+                    print(f"\nError processing {file_path}: {e}")
+                    continue
+
+                if len(notes_data) >= batch_size:
+                    flush()
+
+        flush()
+        self.conn.execute("COMMIT")
+        print(f"\nParsed: {note_id} notes, {link_id} links, {chunk_id} chunks")
 
-        # Phase 2: Generate embeddings
+        # Phase 2: Generate embeddings (only for chunks whose text changed)
         print("\nPhase 2: Generating embeddings...")
-        self._ensure_embedder()
-
-        texts_for_embedding = [
-            EmbeddingGenerator.prepare_chunk_for_embedding(
-                c['content'],
-                c['heading_context'],
-                c['note_title']
+        print(f"Encoding {len(missing):,} of {len(content_hashes):,} chunks "
+              f"(the rest are unchanged or duplicates)")
+
+        if missing:
+            self._ensure_embedder()
+            # One encode call over all changed texts, so sentence-transformers
+            # can length-sort the whole set (see embed_batch)
+            new_embeddings = self.embedder.embed_batch(
+                list(missing.values()),
+                batch_size=embedding_batch_size
             )
-            for c in chunks_data
-        ]
+            existing_embeddings.update(zip(missing, new_embeddings))
+            missing.clear()
 
-        embeddings = self.embedder.embed_batch(
-            texts_for_embedding,
-            batch_size=embedding_batch_size
-        )
-
-        # Phase 3: Bulk insert with batched commits to avoid transaction overflow
+        # Phase 3: Insert embeddings and hyperedges - each batch is loaded from
+        # a registered DataFrame in a single INSERT ... SELECT
         print("\nPhase 3: Inserting into database...")
-        commit_batch_size = 1000  # Commit every 1000 records
 
-        # Insert notes
-        print("Inserting notes...")
-        self.conn.execute("BEGIN TRANSACTION")
-        for i, note in enumerate(tqdm(notes_data, desc="Notes")):
-            self.conn.execute("""
-                INSERT INTO notes (note_id, file_path, slug, title, content,
-                                   frontmatter, tags, aliases, created_date,
-                                   modified_date, word_count)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, [
-                note['note_id'], note['file_path'], note['slug'],
-                note['title'], note['content'], note['frontmatter'],
-                note['tags'], note['aliases'], note['created_date'],
-                note['modified_date'], note['word_count']
-            ])
-            if (i + 1) % commit_batch_size == 0:
-                self.conn.execute("COMMIT")
-                self.conn.execute("BEGIN TRANSACTION")
-        self.conn.execute("COMMIT")
-
-        # Insert links
-        print("Inserting links...")
-        self.conn.execute("BEGIN TRANSACTION")
-        for i, link in enumerate(tqdm(links_data, desc="Links")):
-            self.conn.execute("""
-                INSERT INTO links (link_id, source_slug, target_slug,
-                                   link_text, link_type)
-                VALUES (?, ?, ?, ?, ?)
-            """, [
-                link['link_id'], link['source_slug'], link['target_slug'],
-                link['link_text'], link['link_type']
-            ])
-            if (i + 1) % commit_batch_size == 0:
-                self.conn.execute("COMMIT")
-                self.conn.execute("BEGIN TRANSACTION")
-        self.conn.execute("COMMIT")
-
-        # Insert chunks
-        print("Inserting chunks...")
-        self.conn.execute("BEGIN TRANSACTION")
-        for i, chunk in enumerate(tqdm(chunks_data, desc="Chunks")):
-            self.conn.execute("""
-                INSERT INTO chunks (chunk_id, note_id, chunk_index, content,
-                                    heading_context, chunk_type, start_line, end_line)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, [
-                chunk['chunk_id'], chunk['note_id'], chunk['chunk_index'],
-                chunk['content'], chunk['heading_context'], chunk['chunk_type'],
-                chunk['start_line'], chunk['end_line']
-            ])
-            if (i + 1) % commit_batch_size == 0:
-                self.conn.execute("COMMIT")
-                self.conn.execute("BEGIN TRANSACTION")
-        self.conn.execute("COMMIT")
-
-        # Insert embeddings
         print("Inserting embeddings...")
         self.conn.execute("BEGIN TRANSACTION")
-        for i, emb in enumerate(tqdm(embeddings, desc="Embeddings")):
-            self.conn.execute("""
-                INSERT INTO embeddings (embedding_id, chunk_id, embedding)
-                VALUES (?, ?, ?)
-            """, [i + 1, chunks_data[i]['chunk_id'], emb.tolist()])
-            if (i + 1) % commit_batch_size == 0:
-                self.conn.execute("COMMIT")
-                self.conn.execute("BEGIN TRANSACTION")
+        for start in range(0, len(content_hashes), EMBEDDING_INSERT_BATCH):
+            embedding_rows = [
+                {
+                    'embedding_id': i + 1,
+                    'chunk_id': i + 1,
+                    'embedding': existing_embeddings[sha],
+                    'model_name': self.embedding_source,
+                    'content_sha256': sha
+                }
+                for i, sha in enumerate(
+                    content_hashes[start:start + EMBEDDING_INSERT_BATCH], start
+                )
+            ]
+            self._bulk_insert('embeddings', embedding_rows, [
+                'embedding_id', 'chunk_id', 'embedding', 'model_name', 'content_sha256'
+            ])
         self.conn.execute("COMMIT")
 
-        # Build hyperedges from tags and folders
-        print("Building hyperedges...")
-        hyperedge_map: Dict[tuple, List[int]] = {}  # (type, value) -> [note_ids]
-
-        for note in notes_data:
-            note_id = note['note_id']
-
-            # Tag hyperedges
-            for tag in note.get('tags', []) or []:
-                key = ('tag', tag.lower().strip('#'))
-                if key not in hyperedge_map:
-                    hyperedge_map[key] = []
-                hyperedge_map[key].append(note_id)
-
-            # Folder hyperedge (parent folder path)
-            file_path = note.get('file_path', '')
-            if '/' in file_path:
-                folder = '/'.join(file_path.split('/')[:-1])
-                if folder:
-                    key = ('folder', folder)
-                    if key not in hyperedge_map:
-                        hyperedge_map[key] = []
-                    hyperedge_map[key].append(note_id)
-
-            # Alias hyperedges
-            for alias in note.get('aliases', []) or []:
-                key = ('alias', alias.lower())
-                if key not in hyperedge_map:
-                    hyperedge_map[key] = []
-                hyperedge_map[key].append(note_id)
-
         # Insert hyperedges and members
         print("Inserting hyperedges...")
-        hyperedge_id = 0
-        self.conn.execute("BEGIN TRANSACTION")
-        for (edge_type, edge_value), note_ids in tqdm(hyperedge_map.items(), desc="Hyperedges"):
-            hyperedge_id += 1
-            self.conn.execute("""
-                INSERT INTO hyperedges (hyperedge_id, edge_type, edge_value)
-                VALUES (?, ?, ?)
-            """, [hyperedge_id, edge_type, edge_value])
-
+        hyperedge_rows: List[Dict[str, Any]] = []
+        member_rows: List[Dict[str, Any]] = []
+        for hyperedge_id, ((edge_type, edge_value), note_ids) in enumerate(hyperedge_map.items(), 1):
+            hyperedge_rows.append({
+                'hyperedge_id': hyperedge_id,
+                'edge_type': edge_type,
+                'edge_value': edge_value
+            })
             for nid in set(note_ids):  # Deduplicate in case of duplicate tags
-                self.conn.execute("""
-                    INSERT INTO hyperedge_members (hyperedge_id, note_id)
-                    VALUES (?, ?)
-                """, [hyperedge_id, nid])
-
-            if hyperedge_id % commit_batch_size == 0:
-                self.conn.execute("COMMIT")
-                self.conn.execute("BEGIN TRANSACTION")
+                member_rows.append({'hyperedge_id': hyperedge_id, 'note_id': nid})
+
+        self.conn.execute("BEGIN TRANSACTION")
+        self._bulk_insert('hyperedges', hyperedge_rows, ['hyperedge_id', 'edge_type', 'edge_value'])
+        self._bulk_insert('hyperedge_members', member_rows, ['hyperedge_id', 'note_id'])
         self.conn.execute("COMMIT")
 
-        # Create HNSW index
-        print("\nPhase 4: Creating search index...")
+        # Build indexes over the loaded tables in one pass each
+        print("\nPhase 4: Creating indexes...")
+        create_secondary_indexes(self.conn)
         create_hnsw_index(self.conn)
 
         # Summary
@@ -319,10 +469,10 @@ class SecondBrainIngester:
         print("\n" + "=" * 50)
         print("Ingestion Complete!")
         print("=" * 50)
-        print(f"Notes:       {len(notes_data):,}")
-        print(f"Links:       {len(links_data):,}")
-        print(f"Chunks:      {len(chunks_data):,}")
-        print(f"Embeddings:  {len(embeddings):,}")
+        print(f"Notes:       {note_id:,}")
+        print(f"Links:       {link_id:,}")
+        print(f"Chunks:      {chunk_id:,}")
+        print(f"Embeddings:  {len(content_hashes):,}")
         print(f"Hyperedges:  {len(hyperedge_map):,} ({hyperedge_member_count:,} memberships)")
         print(f"Database:    {self.db_path}")
 
@@ -12,6 +12,23 @@ MODEL_CONFIGS = {
 
 DEFAULT_MODEL = 'all-MiniLM-L6-v2'  # Fast default for testing
 
+# HNSW build parameters (vss defaults, made explicit so they can be tuned)
+HNSW_EF_CONSTRUCTION = 128
+HNSW_M = 16
+
+
+# Secondary indexes for common queries. Created after the bulk load (see
+# create_secondary_indexes), so inserts don't maintain them row by row
+SECONDARY_INDEX_SQL = """
+CREATE INDEX IF NOT EXISTS idx_notes_slug ON notes(slug);
+CREATE INDEX IF NOT EXISTS idx_notes_title ON notes(title);
+CREATE INDEX IF NOT EXISTS idx_links_source ON links(source_slug);
+CREATE INDEX IF NOT EXISTS idx_links_target ON links(target_slug);
+CREATE INDEX IF NOT EXISTS idx_chunks_note ON chunks(note_id);
+CREATE INDEX IF NOT EXISTS idx_hyperedge_type ON hyperedges(edge_type);
+CREATE INDEX IF NOT EXISTS idx_hyperedge_members_note ON hyperedge_members(note_id);
+"""
+
 
 def get_embedding_dim(model_name: str) -> int:
     """Get embedding dimension for a model."""
@@ -54,6 +71,7 @@ CREATE TABLE IF NOT EXISTS chunks (
     note_id INTEGER NOT NULL,
     chunk_index INTEGER NOT NULL,
     content TEXT NOT NULL,
+    content_snippet VARCHAR,  -- first 300 chars for result display
     heading_context VARCHAR,
     chunk_type VARCHAR,
     start_line INTEGER,
@@ -62,12 +80,14 @@ CREATE TABLE IF NOT EXISTS chunks (
 );
 
 -- Embeddings table: vector embeddings for semantic search
--- Dimension is configured based on the model used
+-- Dimension is configured based on the model used. Kept as FLOAT rather than
+-- quantized TINYINT: VSS distance functions and HNSW only accept FLOAT/DOUBLE arrays
 CREATE TABLE IF NOT EXISTS embeddings (
     embedding_id INTEGER PRIMARY KEY,
     chunk_id INTEGER NOT NULL UNIQUE,
     embedding FLOAT[{embedding_dim}] NOT NULL,
     model_name VARCHAR DEFAULT '{model_name}',
+    content_sha256 VARCHAR,  -- hash of the embedded text, reused on re-ingestion
     created_at TIMESTAMP DEFAULT current_timestamp,
     FOREIGN KEY (chunk_id) REFERENCES chunks(chunk_id)
 );
@@ -90,15 +110,6 @@ CREATE TABLE IF NOT EXISTS hyperedge_members (
     FOREIGN KEY (note_id) REFERENCES notes(note_id)
 );
 
--- Indexes for common queries
-CREATE INDEX IF NOT EXISTS idx_notes_slug ON notes(slug);
-CREATE INDEX IF NOT EXISTS idx_notes_title ON notes(title);
-CREATE INDEX IF NOT EXISTS idx_links_source ON links(source_slug);
-CREATE INDEX IF NOT EXISTS idx_links_target ON links(target_slug);
-CREATE INDEX IF NOT EXISTS idx_chunks_note ON chunks(note_id);
-CREATE INDEX IF NOT EXISTS idx_hyperedge_type ON hyperedges(edge_type);
-CREATE INDEX IF NOT EXISTS idx_hyperedge_members_note ON hyperedge_members(note_id);
-
 -- Metadata table to store configuration
 CREATE TABLE IF NOT EXISTS metadata (
     key VARCHAR PRIMARY KEY,
@@ -107,7 +118,13 @@ CREATE TABLE IF NOT EXISTS metadata (
 """
 
 
-def init_database(db_path: str, model_name: str = None, embedding_dim: int = None) -> duckdb.DuckDBPyConnection:
+def init_database(
+    db_path: str,
+    model_name: str = None,
+    embedding_dim: int = None,
+    threads: int = None,
+    memory_limit: str = None
+) -> duckdb.DuckDBPyConnection:
     """
     Initialize database with schema and VSS extension.
 
@@ -115,6 +132,8 @@ def init_database(db_path: str, model_name: str = None, embedding_dim: int = Non
         db_path: Path to DuckDB database file
         model_name: Embedding model name (default: DEFAULT_MODEL)
         embedding_dim: Embedding dimension (auto-detected if not provided)
+        threads: DuckDB worker threads (default: DuckDB's, one per core)
+        memory_limit: DuckDB memory limit, e.g. '8GB' (default: DuckDB's, 80% of RAM)
 
     Returns:
         Open database connection
@@ -129,6 +148,14 @@ def init_database(db_path: str, model_name: str = None, embedding_dim: int = Non
 
     conn = duckdb.connect(db_path)
 
+    if threads:
+        conn.execute(f"SET threads = {int(threads)}")
+    if memory_limit:
+        conn.execute("SET memory_limit = ?", [memory_limit])
+    # Rows carry explicit IDs and every query orders explicitly, so bulk
+    # inserts needn't keep source order (lets DuckDB load in parallel)
+    conn.execute("SET preserve_insertion_order = false")
+
     # Install and load VSS extension for vector similarity search
     print("Installing VSS extension...")
     conn.execute("INSTALL vss;")
@@ -137,13 +164,15 @@ def init_database(db_path: str, model_name: str = None, embedding_dim: int = Non
     # Enable HNSW index persistence for file-based databases
     conn.execute("SET hnsw_enable_experimental_persistence = true;")
 
-    # Create schema with correct embedding dimension
+    create_schema(conn, model_name, embedding_dim)
+    return conn
+
+
+def create_schema(conn: duckdb.DuckDBPyConnection, model_name: str, embedding_dim: int):
+    """Create all tables (if missing) and store model metadata."""
     print(f"Creating schema (model: {model_name}, dim: {embedding_dim})...")
-    schema_sql = get_schema_sql(embedding_dim, model_name)
-    for statement in schema_sql.strip().split(';'):
-        statement = statement.strip()
-        if statement:
-            conn.execute(statement)
+    # DuckDB runs multi-statement SQL in one execute call
+    conn.execute(get_schema_sql(embedding_dim, model_name))
 
     # Store model info in metadata
     conn.execute("""
@@ -152,16 +181,32 @@ def init_database(db_path: str, model_name: str = None, embedding_dim: int = Non
     """, [model_name, str(embedding_dim)])
 
     print("Schema initialized.")
-    return conn
 
 
-def create_hnsw_index(conn: duckdb.DuckDBPyConnection):
-    """Create HNSW index for fast cosine similarity search."""
+def create_secondary_indexes(conn: duckdb.DuckDBPyConnection):
+    """Create the secondary (non-key) indexes; run once after the bulk load."""
+    print("Creating secondary indexes...")
+    conn.execute(SECONDARY_INDEX_SQL)
+
+
+def create_hnsw_index(
+    conn: duckdb.DuckDBPyConnection,
+    ef_construction: int = HNSW_EF_CONSTRUCTION,
+    m: int = HNSW_M
+):
+    """
+    Create HNSW index for fast cosine similarity search.
+
+    Must run once after all embeddings are loaded: building the graph over
+    the full table is much cheaper than maintaining it row by row during
+    inserts. Any existing index is dropped first so it is never stale.
+    """
     print("Creating HNSW index on embeddings (this may take a moment)...")
-    conn.execute("""
-        CREATE INDEX IF NOT EXISTS embedding_cosine_idx
+    conn.execute("DROP INDEX IF EXISTS embedding_cosine_idx")
+    conn.execute(f"""
+        CREATE INDEX embedding_cosine_idx
         ON embeddings USING HNSW (embedding)
-        WITH (metric = 'cosine')
+        WITH (metric = 'cosine', ef_construction = {ef_construction}, M = {m})
     """)
     print("HNSW index created.")
 
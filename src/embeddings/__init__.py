@@ -1,3 +1,4 @@
 from .embedder import EmbeddingGenerator
+from .cache import EmbeddingCache, DiskEmbeddingCache, SimilarityCache
 
-__all__ = ['EmbeddingGenerator']
+__all__ = ['EmbeddingGenerator', 'EmbeddingCache', 'DiskEmbeddingCache', 'SimilarityCache']
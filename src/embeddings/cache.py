@@ -0,0 +1,198 @@
+"""LRU caches for embeddings (in memory and on disk) and embedding-keyed search results."""
+import hashlib
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+import duckdb
+import numpy as np
+
+
+class EmbeddingCache:
+    """Bounded LRU mapping text -> embedding vector."""
+
+    def __init__(self, maxsize: int = 10_000):
+        """
+        Initialize an empty cache.
+
+        Args:
+            maxsize: Maximum number of embeddings kept before evicting the
+                least recently used entry
+        """
+        self.maxsize = maxsize
+        self._entries: OrderedDict[bytes, np.ndarray] = OrderedDict()
+
+    @staticmethod
+    def key(text: str) -> bytes:
+        """SHA-256 digest used as cache key (fixed size regardless of text length)."""
+        return hashlib.sha256(text.encode('utf-8')).digest()
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        """Return the cached embedding for text, or None on a miss."""
+        key = self.key(text)
+        embedding = self._entries.get(key)
+        if embedding is not None:
+            self._entries.move_to_end(key)
+        return embedding
+
+    def put(self, text: str, embedding: np.ndarray):
+        """Store an embedding, evicting the oldest entry when full."""
+        key = self.key(text)
+        self._entries[key] = np.asarray(embedding, dtype=np.float32)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class DiskEmbeddingCache:
+    """
+    Embedding cache persisted in a small DuckDB file.
+
+    Survives across CLI invocations, so repeating a query skips loading the
+    model entirely. Keys hash the model name together with the text. Hits
+    and trimming stay off the query path: last-used times of hit keys are
+    written, and the least recently used rows beyond maxsize trimmed, once
+    on close(). If the file can't be opened (e.g. locked by another process)
+    the cache turns itself off instead of failing the query.
+    """
+
+    def __init__(self, path: str, model_name: str, maxsize: int = 10_000):
+        """
+        Initialize cache (the file is opened on first use).
+
+        Args:
+            path: DuckDB file holding the cache
+            model_name: Embedding model the cached vectors belong to
+            maxsize: Maximum number of rows kept
+        """
+        self.path = path
+        self.model_name = model_name
+        self.maxsize = maxsize
+        self._conn = None
+        self._disabled = False
+        self._used: set[str] = set()  # Keys hit since the last close()
+
+    def _connect(self) -> Optional[duckdb.DuckDBPyConnection]:
+        if self._conn is None and not self._disabled:
+            try:
+                self._conn = duckdb.connect(self.path)
+                self._conn.execute("""
+                    CREATE TABLE IF NOT EXISTS query_embeddings (
+                        key VARCHAR PRIMARY KEY,
+                        embedding FLOAT[] NOT NULL,
+                        last_used TIMESTAMP DEFAULT current_timestamp
+                    )
+                """)
+            except duckdb.Error:
+                self._disabled = True
+                self._conn = None
+        return self._conn
+
+    def key(self, text: str) -> str:
+        """SHA-256 of model name and text."""
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode('utf-8')).hexdigest()
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        """Return the stored embedding for text, or None on a miss."""
+        conn = self._connect()
+        if conn is None:
+            return None
+        key = self.key(text)
+        row = conn.execute(
+            "SELECT embedding FROM query_embeddings WHERE key = ?", [key]
+        ).fetchone()
+        if row is None:
+            return None
+        self._used.add(key)
+        return np.asarray(row[0], dtype=np.float32)
+
+    def put(self, text: str, embedding: np.ndarray):
+        """Store an embedding (trimmed to maxsize rows on close())."""
+        conn = self._connect()
+        if conn is None:
+            return
+        conn.execute(
+            "INSERT OR REPLACE INTO query_embeddings (key, embedding) VALUES (?, ?)",
+            [self.key(text), np.asarray(embedding, dtype=np.float32).tolist()]
+        )
+
+    def close(self):
+        """Record hit times, trim the least recently used rows and close the file."""
+        if self._conn is None:
+            return
+        try:
+            if self._used:
+                self._conn.execute("""
+                    UPDATE query_embeddings SET last_used = current_timestamp
+                    WHERE key IN (SELECT unnest(?::VARCHAR[]))
+                """, [list(self._used)])
+                self._used.clear()
+            count = self._conn.execute("SELECT count(*) FROM query_embeddings").fetchone()[0]
+            if count > self.maxsize:
+                self._conn.execute("""
+                    DELETE FROM query_embeddings WHERE key IN (
+                        SELECT key FROM query_embeddings ORDER BY last_used DESC OFFSET ?
+                    )
+                """, [self.maxsize])
+        except duckdb.Error:
+            pass  # Bookkeeping only; never fail the caller's shutdown
+        finally:
+            self._conn.close()
+            self._conn = None
+
+
+class SimilarityCache:
+    """
+    Bounded LRU of search results keyed by query embedding.
+
+    A lookup hits when a cached query with the same parameters has cosine
+    similarity >= threshold to the new one, so near-duplicate phrasings
+    ("data modeling" / "data modelling") reuse the earlier results.
+    """
+
+    def __init__(self, maxsize: int = 256, threshold: float = 0.97):
+        """
+        Initialize an empty cache.
+
+        Args:
+            maxsize: Maximum number of cached result sets
+            threshold: Minimum cosine similarity for a cache hit
+        """
+        self.maxsize = maxsize
+        self.threshold = threshold
+        self._entries: OrderedDict[int, Tuple[Hashable, np.ndarray, Any]] = OrderedDict()
+        self._next_id = 0
+
+    @staticmethod
+    def _unit(embedding: np.ndarray) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def get(self, embedding: np.ndarray, params: Hashable) -> Optional[Any]:
+        """Return results of the most similar cached query with equal params."""
+        query = self._unit(embedding)
+        best_id, best_similarity = None, self.threshold
+        for entry_id, (entry_params, vector, _) in self._entries.items():
+            if entry_params != params:
+                continue
+            similarity = float(vector @ query)
+            if similarity >= best_similarity:
+                best_id, best_similarity = entry_id, similarity
+
+        if best_id is None:
+            return None
+        self._entries.move_to_end(best_id)
+        return self._entries[best_id][2]
+
+    def put(self, embedding: np.ndarray, params: Hashable, results: Any):
+        """Cache results for a query, evicting the oldest entry when full."""
+        self._entries[self._next_id] = (params, self._unit(embedding), results)
+        self._next_id += 1
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
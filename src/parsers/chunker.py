@@ -1,10 +1,15 @@
 """Markdown-aware content chunking for embedding generation."""
 import re
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import Iterator, List, Optional, Tuple
 
+# Compiled once at import; runs for every oversized block. Sentence end
+# punctuation is matched (not looked behind for) so the engine can scan
+# ahead to candidate characters; group 1 is the whitespace to split on
+_SENTENCE_BREAK_RE = re.compile(r'[.!?](\s+)(?=[A-Z])')
 
-@dataclass
+
+@dataclass(slots=True)
 class Chunk:
     """A content chunk with context metadata."""
     content: str
@@ -14,126 +19,140 @@ class Chunk:
     end_line: int
 
 
-def chunk_markdown(content: str, max_chunk_size: int = 512) -> List[Chunk]:
+def _is_list_line(stripped: str) -> bool:
     """
-    Smart chunking that respects markdown structure.
+    True for '- ', '* ', '+ ' and '1. ' style list items.
 
-    - Keeps headings with their immediate content
-    - Preserves code blocks intact (unless very large)
-    - Respects paragraph boundaries
-    - Maintains heading context for each chunk
+    Plain character checks instead of matching ^[-*+]\\s and ^\\d+\\.\\s per
+    line, with the same result (isspace/isdecimal are what `re` uses for
+    \\s and \\d on str).
     """
-    if not content or not content.strip():
-        return []
+    first = stripped[:1]
+    if not first:
+        return False
+    if first in '-*+':
+        return stripped[1:2].isspace()
+    if first.isdecimal():
+        i = 1
+        n = len(stripped)
+        while i < n and stripped[i].isdecimal():
+            i += 1
+        return stripped[i:i + 1] == '.' and stripped[i + 1:i + 2].isspace()
+    return False
+
+
+def _split_sentences(text: str) -> List[str]:
+    """Split text on whitespace after '.', '!' or '?' that precedes a capital."""
+    sentences = []
+    start = 0
+    for match in _SENTENCE_BREAK_RE.finditer(text):
+        sentences.append(text[start:match.start(1)])
+        start = match.end(1)
+    sentences.append(text[start:])
+    return sentences
+
+
+def _iter_blocks(lines: List[str]) -> Iterator[Tuple[str, str, int, int, Optional[str]]]:
+    """
+    Split lines into structural blocks: code blocks, paragraphs and lists.
 
-    chunks = []
-    lines = content.split('\n')
-    current_heading = None
+    Yields (text, block_type, start_line, end_line, heading) as blocks are
+    closed. Headings only update the heading context and are not yielded.
 
-    # First pass: identify structural blocks
-    blocks = []
-    current_block_lines = []
+    A block's lines are always a contiguous run of `lines`, so only the
+    index of its first line is tracked and the text is joined from a slice
+    when the block is yielded. A paragraph's first line is never blank
+    (blank lines only extend an open block), so an open block always has
+    content.
+    """
+    current_heading = None
+    block_first = None  # Index of the open block's first line, None if no block
+    block_len = 0  # len('\n'.join(block lines)) + 1, for paragraphs and lists
     current_block_type = 'paragraph'
     in_code_block = False
     block_start = 0
 
     for i, line in enumerate(lines):
+        stripped = line.strip()
         # Track code blocks
-        if line.strip().startswith('```'):
+        if stripped.startswith('```'):
             if in_code_block:
                 # End of code block
-                current_block_lines.append(line)
-                blocks.append({
-                    'lines': current_block_lines,
-                    'type': 'code_block',
-                    'start': block_start,
-                    'end': i,
-                    'heading': current_heading
-                })
-                current_block_lines = []
+                yield ('\n'.join(lines[block_first:i + 1]), 'code_block',
+                       block_start, i, current_heading)
+                block_first = None
                 in_code_block = False
                 block_start = i + 1
                 current_block_type = 'paragraph'
             else:
                 # Start of code block - flush current content
-                if current_block_lines and any(l.strip() for l in current_block_lines):
-                    blocks.append({
-                        'lines': current_block_lines,
-                        'type': current_block_type,
-                        'start': block_start,
-                        'end': i - 1,
-                        'heading': current_heading
-                    })
-                current_block_lines = [line]
+                if block_first is not None:
+                    yield ('\n'.join(lines[block_first:i]), current_block_type,
+                           block_start, i - 1, current_heading)
+                block_first = i
                 in_code_block = True
                 block_start = i
                 current_block_type = 'code_block'
         elif in_code_block:
-            current_block_lines.append(line)
-        elif line.strip().startswith('#'):
+            continue
+        elif stripped.startswith('#'):
             # Heading - flush current and update context
-            if current_block_lines and any(l.strip() for l in current_block_lines):
-                blocks.append({
-                    'lines': current_block_lines,
-                    'type': current_block_type,
-                    'start': block_start,
-                    'end': i - 1,
-                    'heading': current_heading
-                })
-            current_heading = line.strip()
-            # Add heading as its own small block
-            blocks.append({
-                'lines': [line],
-                'type': 'heading',
-                'start': i,
-                'end': i,
-                'heading': current_heading
-            })
-            current_block_lines = []
+            if block_first is not None:
+                yield ('\n'.join(lines[block_first:i]), current_block_type,
+                       block_start, i - 1, current_heading)
+            current_heading = stripped
+            block_first = None
             block_start = i + 1
             current_block_type = 'paragraph'
-        elif line.strip() == '':
+        elif stripped == '':
             # Empty line - potential paragraph break for larger blocks
-            if current_block_lines and len('\n'.join(current_block_lines)) > 100:
-                blocks.append({
-                    'lines': current_block_lines,
-                    'type': current_block_type,
-                    'start': block_start,
-                    'end': i - 1,
-                    'heading': current_heading
-                })
-                current_block_lines = []
+            if block_first is not None and block_len - 1 > 100:
+                yield ('\n'.join(lines[block_first:i]), current_block_type,
+                       block_start, i - 1, current_heading)
+                block_first = None
                 block_start = i + 1
-            elif current_block_lines:
-                current_block_lines.append(line)
+            elif block_first is not None:
+                block_len += len(line) + 1
         else:
             # Detect list items
-            if re.match(r'^[\-\*\+]\s', line.strip()) or re.match(r'^\d+\.\s', line.strip()):
+            if _is_list_line(stripped):
                 current_block_type = 'list'
-            current_block_lines.append(line)
+            if block_first is None:
+                block_first = i
+                block_len = 0
+            block_len += len(line) + 1
 
     # Flush remaining content
-    if current_block_lines and any(l.strip() for l in current_block_lines):
-        blocks.append({
-            'lines': current_block_lines,
-            'type': current_block_type,
-            'start': block_start,
-            'end': len(lines) - 1,
-            'heading': current_heading
-        })
-
-    # Second pass: merge small blocks, split large ones
-    merged_content = []
+    if block_first is not None:
+        yield ('\n'.join(lines[block_first:]), current_block_type,
+               block_start, len(lines) - 1, current_heading)
+
+
+def chunk_markdown(content: str, max_chunk_size: int = 512) -> List[Chunk]:
+    """
+    Smart chunking that respects markdown structure.
+
+    - Keeps headings with their immediate content
+    - Preserves code blocks intact (unless very large)
+    - Respects paragraph boundaries
+    - Maintains heading context for each chunk
+
+    Blocks are consumed as _iter_blocks produces them, and the merged size
+    is tracked as a running count instead of re-joining the merged parts
+    for every block.
+    """
+    if not content or not content.strip():
+        return []
+
+    chunks = []
+    merged_content: List[str] = []
+    merged_len = 0  # len('\n'.join(merged_content))
     merged_heading = None
     merged_start = 0
     merged_end = 0
 
-    for block in blocks:
-        if block['type'] == 'heading':
-            # Headings don't get chunked separately, they provide context
-            continue
-
-        block_text = '\n'.join(block['lines']).strip()
+    for text, block_type, block_start, block_end, heading in _iter_blocks(content.split('\n')):
+        block_text = text.strip()
         if not block_text:
             continue
 
@@ -148,9 +167,10 @@ def chunk_markdown(content: str, max_chunk_size: int = 512) -> List[Chunk]:
                     end_line=merged_end
                 ))
                 merged_content = []
+                merged_len = 0
 
             # Split large block by sentences/paragraphs
-            sentences = re.split(r'(?<=[.!?])\s+(?=[A-Z])', block_text)
+            sentences = _split_sentences(block_text)
             current_chunk_parts = []
             chunk_len = 0
 
@@ -158,10 +178,10 @@ def chunk_markdown(content: str, max_chunk_size: int = 512) -> List[Chunk]:
                 if chunk_len + len(sentence) > max_chunk_size and current_chunk_parts:
                     chunks.append(Chunk(
                         content=' '.join(current_chunk_parts).strip(),
-                        heading_context=block['heading'],
-                        chunk_type=block['type'],
-                        start_line=block['start'],
-                        end_line=block['end']
+                        heading_context=heading,
+                        chunk_type=block_type,
+                        start_line=block_start,
+                        end_line=block_end
                     ))
                     current_chunk_parts = [sentence]
                     chunk_len = len(sentence)
@@ -172,18 +192,21 @@ def chunk_markdown(content: str, max_chunk_size: int = 512) -> List[Chunk]:
             if current_chunk_parts:
                 chunks.append(Chunk(
                     content=' '.join(current_chunk_parts).strip(),
-                    heading_context=block['heading'],
-                    chunk_type=block['type'],
-                    start_line=block['start'],
-                    end_line=block['end']
+                    heading_context=heading,
+                    chunk_type=block_type,
+                    start_line=block_start,
+                    end_line=block_end
                 ))
-        elif len('\n'.join(merged_content)) + len(block_text) < max_chunk_size:
+        elif merged_len + len(block_text) < max_chunk_size:
             # Merge small blocks together
             if not merged_content:
-                merged_start = block['start']
-                merged_heading = block['heading']
+                merged_start = block_start
+                merged_heading = heading
+            else:
+                merged_len += 1  # '\n' separator
             merged_content.append(block_text)
-            merged_end = block['end']
+            merged_len += len(block_text)
+            merged_end = block_end
         else:
             # Flush merged and start new
             if merged_content:
@@ -195,9 +218,10 @@ def chunk_markdown(content: str, max_chunk_size: int = 512) -> List[Chunk]:
                     end_line=merged_end
                 ))
             merged_content = [block_text]
-            merged_heading = block['heading']
-            merged_start = block['start']
-            merged_end = block['end']
+            merged_len = len(block_text)
+            merged_heading = heading
+            merged_start = block_start
+            merged_end = block_end
 
     # Final flush
     if merged_content:
@@ -3,8 +3,24 @@ import re
 from dataclasses import dataclass
 from typing import List
 
-
-@dataclass
+# Compiled once at import; these run for every note in the vault.
+# The link patterns use possessive quantifiers (*+, ++): each character
+# class excludes the delimiter that follows it, so giving back characters
+# can never produce a match, and failed attempts on stray '[[' stay linear
+_SLUG_INVALID_RE = re.compile(r'[^\w\-]')
+# Same mapping for ASCII text as a bytes.translate table (one C-level pass)
+_SLUG_ASCII_TABLE = bytes(
+    c if chr(c).isalnum() or chr(c) in '_-' else ord('-') for c in range(256)
+)
+# [[target]], [[target|display text]], [[target#heading|display]]
+_WIKILINK_RE = re.compile(r'\[\[([^\]|#]++)(?:#[^\]|]*+)?(?:\|([^\]]++))?\]\]')
+_DATE_ONLY_RE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+_ORIGIN_RE = re.compile(r'Origin:?\s*+\[\[([^\]|]++)(?:\|[^\]]++)?\]\]')
+_REFERENCES_RE = re.compile(r'References:?\s*(.+?)(?:\n|$)')
+_REF_LINK_RE = re.compile(r'\[\[([^\]|]++)(?:\|[^\]]++)?\]\]')
+
+
+@dataclass(slots=True)
 class WikiLink:
     """Represents a single wikilink connection."""
     source_slug: str
@@ -20,9 +36,12 @@ def normalize_slug(target: str) -> str:
     # Lowercase and strip
     slug = target.lower().strip()
     # Replace spaces and special chars with hyphens
-    slug = re.sub(r'[^\w\-]', '-', slug)
-    slug = re.sub(r'-+', '-', slug).strip('-')
-    return slug
+    if slug.isascii():
+        slug = slug.encode('ascii').translate(_SLUG_ASCII_TABLE).decode('ascii')
+    else:
+        slug = _SLUG_INVALID_RE.sub('-', slug)
+    # Collapse hyphen runs and trim hyphens at both ends
+    return '-'.join(filter(None, slug.split('-')))
 
 
 def extract_wikilinks(content: str, source_slug: str) -> List[WikiLink]:
@@ -38,13 +57,13 @@ def extract_wikilinks(content: str, source_slug: str) -> List[WikiLink]:
     Also extracts Origin and References metadata links.
     """
     links = []
-    seen = set()  # Track unique (source, target, text) tuples
+    if '[[' not in content:
+        # Every link form below needs '[['; skip the regex scans
+        return links
 
-    # Pattern for [[target]] and [[target|display text]]
-    # Handles nested brackets and special characters
-    wikilink_pattern = r'\[\[([^\]|#]+)(?:#[^\]|]*)?(?:\|([^\]]+))?\]\]'
+    seen = set()  # Track unique (source, target, text) tuples
 
-    for match in re.finditer(wikilink_pattern, content):
+    for match in _WIKILINK_RE.finditer(content):
         target = match.group(1).strip()
         display_text = (match.group(2) or target).strip()
 
@@ -53,7 +72,7 @@ def extract_wikilinks(content: str, source_slug: str) -> List[WikiLink]:
             continue
 
         # Skip pure date links like [[2024-01-01]] (they're just date references)
-        if re.match(r'^\d{4}-\d{2}-\d{2}$', target):
+        if _DATE_ONLY_RE.match(target):
             continue
 
         # Skip embedded content links (![[image.png]])
@@ -72,9 +91,15 @@ def extract_wikilinks(content: str, source_slug: str) -> List[WikiLink]:
                 link_type='wikilink'
             ))
 
+    # The Origin/References passes rescan the whole note, so they only run
+    # when their keyword occurs (a C-level substring search; most notes
+    # have neither). Kept as separate passes: their patterns accept targets
+    # and embeds the wikilink pass skips, and pass order decides link_type
+    # for links found by both.
+
     # Extract Origin links (special metadata at end of notes)
-    origin_pattern = r'Origin:?\s*\[\[([^\]|]+)(?:\|[^\]]+)?\]\]'
-    for match in re.finditer(origin_pattern, content):
+    origin_matches = _ORIGIN_RE.finditer(content) if 'Origin' in content else ()
+    for match in origin_matches:
         target = match.group(1).strip()
         target_slug = normalize_slug(target)
         key = (source_slug, target_slug, target)
@@ -89,10 +114,10 @@ def extract_wikilinks(content: str, source_slug: str) -> List[WikiLink]:
             ))
 
     # Extract References links (can be comma-separated)
-    ref_pattern = r'References:?\s*(.+?)(?:\n|$)'
-    for match in re.finditer(ref_pattern, content):
+    reference_matches = _REFERENCES_RE.finditer(content) if 'References' in content else ()
+    for match in reference_matches:
         refs_text = match.group(1)
-        for ref_match in re.finditer(r'\[\[([^\]|]+)(?:\|[^\]]+)?\]\]', refs_text):
+        for ref_match in _REF_LINK_RE.finditer(refs_text):
             target = ref_match.group(1).strip()
             target_slug = normalize_slug(target)
             key = (source_slug, target_slug, target)